@@ -2,82 +2,46 @@
 
 import pandas as pd
 import os
-from playwright.sync_api import sync_playwright
+from scraping_backends import get_backend, HARVEST_BACKEND
 
 # === Configuration ===
 SCRAPED_PAGES_CSV = "all_links.csv"
 SCRAPED_LEADS_CSV = "all_leads.csv"
+FACEBOOK_BASE_URL = "https://www.facebook.com"
 SCROLL_DELAY_MS = 3000
+INITIAL_LOAD_WAIT_MS = 5000
+PRUNE_HARVESTED_CARDS = True
 
 # === Phase 1: Scrape Page Links with Continuous Scrolling ===
-def scrape_meta_ads_page_links(search_keyword, country_code,logger, log_list, start_date_min=None, start_date_max=None, existing_links=None):
+def scrape_meta_ads_page_links(search_keyword, country_code,logger, log_list, start_date_min=None, start_date_max=None, existing_links=None,
+                               prune_harvested=PRUNE_HARVESTED_CARDS, scroll_stats=None, backend=None):
     if existing_links is None:
         existing_links = set()
+    if scroll_stats is None:
+        scroll_stats = []
 
-    with sync_playwright() as p:
-        browser = p.firefox.launch(headless=True)
-        page = browser.new_page()
+    search_query = search_keyword.replace(" ", "%20")
+    search_url = f"{FACEBOOK_BASE_URL}/ads/library/?active_status=all&ad_type=all&country={country_code}&q={search_query}"
 
-        search_query = search_keyword.replace(" ", "%20")
-        search_url = f"https://www.facebook.com/ads/library/?active_status=all&ad_type=all&country={country_code}&q={search_query}"
+    if start_date_min:
+        search_url += f"&start_date[min]={start_date_min}"
+    if start_date_max:
+        search_url += f"&start_date[max]={start_date_max}"
 
-        if start_date_min:
-            search_url += f"&start_date[min]={start_date_min}"
-        if start_date_max:
-            search_url += f"&start_date[max]={start_date_max}"
-
-        page.goto(search_url)
-
-        logger.info("Waiting for page to load...")
-        log_list.put("Waiting for page to load...")
-        page.wait_for_timeout(5000)
-
-        advertiser_links = set()
-        advertiser_data = []
-        count = 0
-        skipped = 0
-
-        previous_height = 0
-        scroll_round = 0
-        while True:
-            scroll_round += 1
-            logger.info(f"[Scroll {scroll_round}] Collecting page links...")
-            log_list.put(f"[Scroll {scroll_round}] Collecting page links...")
-            link_elements = page.locator("a[href^='https://www.facebook.com/']").all()
-            for link_element in link_elements:
-                href = link_element.get_attribute("href")
-                classes = link_element.get_attribute("class")
-                name = link_element.inner_text().strip()
-                if href and classes and "xt0psk2" in classes:
-                    clean_href = href.split("?")[0]
-                    if clean_href not in advertiser_links and clean_href not in existing_links:
-                        advertiser_links.add(clean_href)
-                        advertiser_data.append({"Page Name": name, "Page Link": clean_href})
-                        count += 1
-                        logger.info(f"[{count}] New link: {clean_href} | Name: {name}")
-                        log_list.put(f"[{count}] New link: {clean_href} | Name: {name}")
-                    elif clean_href in existing_links:
-                        skipped += 1
-            page.evaluate("window.scrollBy(0, document.body.scrollHeight)")
-            page.wait_for_timeout(SCROLL_DELAY_MS)
-            new_height = page.evaluate("document.body.scrollHeight")
-            if new_height == previous_height:
-                logger.info("Reached end of page.")
-                log_list.put("Reached end of page.")
-                break 
-            previous_height = new_height
-
-        logger.info(f"Skipped {skipped} already-known links.")
-        log_list.put(f"Skipped {skipped} already-known links.")
-        browser.close()
-        return advertiser_data
+    return get_backend(backend or HARVEST_BACKEND).harvest_ad_links(
+        search_url, f"{FACEBOOK_BASE_URL}/", logger, log_list, existing_links=existing_links,
+        initial_wait_ms=INITIAL_LOAD_WAIT_MS, scroll_delay_ms=SCROLL_DELAY_MS,
+        prune_harvested=prune_harvested, scroll_stats=scroll_stats)
 
 # === Wrapper Function ===
-def run_scrape_page_links(country_code,search_keyword, data_directory, logger, log_list, start_date_min=None, start_date_max=None):
+def run_scrape_page_links(country_code,search_keyword, data_directory, logger, log_list, start_date_min=None, start_date_max=None,
+                          backend=None):
     logger.info("Starting Phase 1: Scrape Facebook Page Links...")
     log_list.put("Starting Phase 1: Scrape Facebook Page Links...")
 
     # Load existing links
+    existing_df = pd.DataFrame()
+    existing_links = set()
     if os.path.exists(SCRAPED_LEADS_CSV):
         try:
             existing_df = pd.read_csv(SCRAPED_LEADS_CSV)
@@ -91,6 +55,7 @@ def run_scrape_page_links(country_code,search_keyword, data_directory, logger, l
             log_list.put("No existing CSV found — starting fresh.")
 
     # Run scraper
+    scroll_stats = []
     links_data = scrape_meta_ads_page_links(
         search_keyword=search_keyword,
         country_code=country_code,
@@ -98,9 +63,17 @@ def run_scrape_page_links(country_code,search_keyword, data_directory, logger, l
         start_date_max=start_date_max,
         existing_links=existing_links,
         logger = logger,
-        log_list = log_list
+        log_list = log_list,
+        scroll_stats = scroll_stats,
+        backend = backend
     )
 
+    if scroll_stats:
+        pd.DataFrame(scroll_stats).to_csv(f"{data_directory}/scroll_stats.csv", index=False)
+        rss = [r["browser_rss_bytes"] for r in scroll_stats if r["browser_rss_bytes"] is not None]
+        logger.info(f"Peak DOM nodes over {len(scroll_stats)} scroll rounds: {max(r['dom_nodes'] for r in scroll_stats)}"
+                    + (f", peak browser RSS: {max(rss) / 1_048_576:.1f} MB." if rss else "."))
+
     logger.info(f"Scraped {len(links_data)} new unique page links.")
     log_list.put(f"Scraped {len(links_data)} new unique page links.")
 
@@ -0,0 +1,129 @@
+# engine_benchmark.py
+#
+# Runs each scraping backend against the same fixture Ad Library and page
+# profiles, so the fastest engine can be picked per workload:
+#   harvest:  scroll the Ad Library search to the end and collect advertiser links
+#   profiles: fetch every page profile and extract its record
+#
+# Records are checked against what the fixture rendered, so an engine that is
+# fast but extracts the wrong fields shows up as such.
+#
+#   python benchmarks/engine_benchmark.py --pages 50
+#   python benchmarks/engine_benchmark.py --engines http playwright-firefox --latency-ms 100
+
+import argparse
+import json
+import logging
+import os
+import queue
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.dirname(BENCH_DIR), BENCH_DIR]
+
+from fixture_servers import FacebookFixtureServer
+from run_benchmark import percentile
+import shared_browser
+from scraping_backends import BACKENDS, RECORD_FIELDS, PageFetchError, get_backend
+
+
+def bench_harvest(backend, facebook, args, logger):
+    started = time.perf_counter()
+    links = backend.harvest_ad_links(f"{facebook.url}/ads/library/?q=benchmark", f"{facebook.url}/", logger,
+                                     queue.Queue(), initial_wait_ms=args.scroll_delay_ms,
+                                     scroll_delay_ms=args.scroll_delay_ms)
+    elapsed = time.perf_counter() - started
+    return {
+        "links": len(links),
+        "complete": len(links) == facebook.pages,
+        "wall_s": round(elapsed, 2),
+        "links_per_sec": round(len(links) / elapsed, 2),
+    }
+
+
+def bench_profiles(backend, facebook):
+    samples, mismatched, failed = [], 0, 0
+    first_mismatch = None
+    started = time.perf_counter()
+    for i in range(facebook.pages):
+        page_started = time.perf_counter()
+        try:
+            record, _ = backend.fetch_page(f"{facebook.url}/page{i}")
+        except PageFetchError:
+            failed += 1
+            continue
+        samples.append(time.perf_counter() - page_started)
+        expected = facebook.expected_record(i)
+        diff = {field: [record.get(field), expected[field]] for field in RECORD_FIELDS
+                if record.get(field) != expected[field]}
+        if diff:
+            mismatched += 1
+            first_mismatch = first_mismatch or {"page": i, "got_vs_expected": diff}
+    elapsed = time.perf_counter() - started
+    return {
+        "pages": facebook.pages,
+        "failed": failed,
+        "mismatched": mismatched,
+        "first_mismatch": first_mismatch,
+        "wall_s": round(elapsed, 2),
+        "pages_per_sec": round(facebook.pages / elapsed, 2),
+        "p50_s": round(percentile(samples, 50), 4) if samples else None,
+        "p95_s": round(percentile(samples, 95), 4) if samples else None,
+    }
+
+
+def run_workload(fn, *args):
+    """A missing browser or driver marks the engine unavailable instead of ending the run."""
+    try:
+        return fn(*args)
+    except NotImplementedError as e:
+        return {"unsupported": str(e)}
+    except Exception as e:
+        return {"unavailable": f"{type(e).__name__}: {str(e).splitlines()[0] if str(e) else ''}"}
+
+
+def fastest(results, workload, metric, ok):
+    candidates = {engine: result[workload] for engine, result in results.items()
+                  if metric in result[workload] and ok(result[workload])}
+    return max(candidates, key=lambda engine: candidates[engine][metric]) if candidates else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare scraping backends on the local fixtures.")
+    parser.add_argument("--engines", nargs="+", default=list(BACKENDS), choices=list(BACKENDS))
+    parser.add_argument("--pages", type=int, default=30, help="advertisers in the fixture Ad Library")
+    parser.add_argument("--batch-size", type=int, default=10, help="ad cards per infinite-scroll batch")
+    parser.add_argument("--latency-ms", type=int, default=50, help="fixture Facebook response latency")
+    parser.add_argument("--popup-rate", type=float, default=0.5)
+    parser.add_argument("--scroll-delay-ms", type=int, default=500)
+    args = parser.parse_args()
+
+    facebook = FacebookFixtureServer(pages=args.pages, batch_size=args.batch_size, latency_ms=args.latency_ms,
+                                     popup_rate=args.popup_rate).start()
+    logger = logging.getLogger("engine_benchmark")
+    logger.setLevel("WARNING")
+
+    results = {}
+    for engine in args.engines:
+        backend = get_backend(engine)
+        results[engine] = {
+            "harvest": run_workload(bench_harvest, backend, facebook, args, logger),
+            "profiles": run_workload(bench_profiles, backend, facebook),
+        }
+        backend.close()
+    shared_browser.close_browser()
+    facebook.stop()
+
+    print(json.dumps({
+        "config": vars(args),
+        "engines": results,
+        "fastest": {
+            "harvest": fastest(results, "harvest", "links_per_sec", lambda r: r["complete"]),
+            "profiles": fastest(results, "profiles", "pages_per_sec", lambda r: not r["failed"] and not r["mismatched"]),
+        },
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
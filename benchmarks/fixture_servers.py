@@ -0,0 +1,291 @@
+# fixture_servers.py
+#
+# Local stand-ins for everything the pipeline talks to, so it can be benchmarked
+# without touching Facebook or OpenAI:
+#   - FacebookFixtureServer: Ad Library search with infinite scroll + page profiles
+#   - MockLLMServer:         OpenAI-compatible /v1/chat/completions
+#   - LeadWebsiteServer:     the businesses' own websites
+#   - ForwardProxyServer:    an HTTP forward proxy, for SCRAPER_PROXIES
+
+import base64
+import json
+import os
+import re
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# Icon file names the profile scraper keys the intro section on.
+INTRO_ICONS = {
+    "phone": "Dc7-7AgwkwS.png",
+    "whatsapp": "lnfZfe30sq0.png",
+    "email": "2PIcyqpptfD.png",
+    "website": "BQdeC67wT9z.png",
+    "address": "8k_Y-oVxbuU.png",
+}
+CATEGORIES = ["Edutech", "Pharma and Healthcare", "Ecommerce", "IT and Tech",
+              "Logistics", "Professional Services", "Other"]
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def render(template, **values):
+    for key, value in values.items():
+        template = template.replace("{{" + key + "}}", str(value))
+    return template
+
+
+class _Server:
+    """Runs a ThreadingHTTPServer on a free local port in a daemon thread."""
+
+    def __init__(self, handler_class):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler_class)
+        self.httpd.owner = self
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def owner(self):
+        return self.server.owner
+
+    def send_body(self, body, content_type="text/html; charset=utf-8", status=200):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+# === Facebook: Ad Library + page profiles ===
+
+class _FacebookHandler(_Handler):
+    def do_GET(self):
+        owner = self.owner
+        owner.count_request()
+        time.sleep(owner.latency_ms / 1000)
+        parts = urlsplit(self.path)
+
+        if parts.path.rstrip("/") == "/ads/library":
+            return self.send_body(render(owner.ad_library_html, base_url=owner.url))
+        if parts.path == "/ads/library/batch":
+            start = int(parse_qs(parts.query).get("start", ["0"])[0])
+            end = min(start + owner.batch_size, owner.pages)
+            cards = [{"id": i, "name": f"Advertiser {i}", "body": "Limited offer on our services. " * 20}
+                     for i in range(start, end)]
+            return self.send_body(json.dumps(cards), "application/json")
+
+        match = re.fullmatch(r"/page(\d+)", parts.path)
+        if match and int(match.group(1)) < owner.pages:
+            return self.send_body(owner.render_profile(int(match.group(1))))
+        self.send_body("Not found", "text/plain", status=404)
+
+
+class FacebookFixtureServer(_Server):
+    def __init__(self, pages=50, batch_size=10, latency_ms=50, popup_rate=0.5, popup_delay_ms=300,
+                 f_grade_every=5, website_url=None):
+        super().__init__(_FacebookHandler)
+        self.pages = pages
+        self.batch_size = batch_size
+        self.latency_ms = latency_ms
+        self.popup_rate = popup_rate
+        self.popup_delay_ms = popup_delay_ms
+        self.f_grade_every = f_grade_every
+        self.website_url = website_url
+        self.ad_library_html = load_fixture("ad_library.html")
+        self.profile_html = load_fixture("page_profile.html")
+
+    def _intro_row(self, kind, value):
+        if kind == "website":
+            value = f'<a href="{value}">{value}</a>'
+        return (f'    <div class="x9f619 x1ja2u2z"><img src="/rsrc/{INTRO_ICONS[kind]}" width="20" height="20"></div>\n'
+                f'    <div class="x9f619 x1ja2u2z"><span>{value}</span></div>')
+
+    def contacts(self, i):
+        """Deterministic contact mix so every grade shows up; every f_grade_every-th page has none."""
+        if self.f_grade_every and i % self.f_grade_every == self.f_grade_every - 1:
+            return {}
+        contacts = {"address": f"{i} Market Road, Kochi"}
+        if i % 2 == 0:
+            contacts["phone"] = f"+91 98{i:08d}"
+        if i % 3 == 0:
+            contacts["whatsapp"] = f"+91 97{i:08d}"
+        if i % 4 != 3:
+            contacts["email"] = f"hello@advertiser{i}.example"
+        if i % 2 == 1 or i % 3 == 0:
+            contacts["website"] = f"{self.website_url}/lead/{i}" if self.website_url else f"advertiser{i}.example"
+        return contacts
+
+    def expected_record(self, i):
+        """The record a backend should extract from profile i (see scraping_backends.RECORD_FIELDS)."""
+        fields = {"phone": "phone_numbers", "whatsapp": "whatsapp_numbers", "email": "emails",
+                  "website": "websites", "address": "address"}
+        record = {field: "" for field in fields.values()}
+        record.update({fields[kind]: value for kind, value in self.contacts(i).items()})
+        record.update({
+            "Business_Name": f"Advertiser {i}",
+            "facebook_url": f"{self.url}/page{i}",
+            "intro_desc": f"Advertiser {i} builds software and runs online courses for small businesses.",
+            "followers": f"{(i * 137) % 10000:,} followers",
+        })
+        return record
+
+    def render_profile(self, i):
+        rows = "\n".join(self._intro_row(kind, value) for kind, value in self.contacts(i).items())
+        # Spread popups evenly over the pages at the configured rate.
+        has_popup = int((i + 1) * self.popup_rate) > int(i * self.popup_rate)
+        return render(
+            self.profile_html,
+            name=f"Advertiser {i}",
+            followers=f"{(i * 137) % 10000:,}",
+            description=f"Advertiser {i} builds software and runs online courses for small businesses.",
+            intro_rows=rows,
+            popup_delay_ms=self.popup_delay_ms if has_popup else -1,
+        )
+
+
+# === OpenAI-compatible chat completions ===
+
+class _LLMHandler(_Handler):
+    def do_POST(self):
+        owner = self.owner
+        owner.count_request()
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        time.sleep(owner.latency_ms / 1000)
+
+        messages = request.get("messages", [])
+        system = next((m["content"] for m in messages if m["role"] == "system"), "")
+        user = next((m["content"] for m in messages if m["role"] == "user"), "")
+        if "classif" in system:
+            content = CATEGORIES[len(user) % len(CATEGORIES)]
+        elif "summary" in system.lower() and "sales" not in system.lower():
+            content = "The company sells software subscriptions and online courses to small businesses."
+        else:
+            content = "Automate order updates and follow-ups over WhatsApp to cut support load."
+
+        prompt_tokens = sum(len(m.get("content", "")) for m in messages) // 4
+        completion_tokens = len(content) // 4
+        body = {
+            "id": f"chatcmpl-bench-{owner.requests}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "mock"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens},
+        }
+        self.send_body(json.dumps(body), "application/json")
+
+
+class MockLLMServer(_Server):
+    def __init__(self, latency_ms=200):
+        super().__init__(_LLMHandler)
+        self.latency_ms = latency_ms
+
+
+# === Lead websites ===
+
+class _WebsiteHandler(_Handler):
+    def do_GET(self):
+        owner = self.owner
+        owner.count_request()
+        time.sleep(owner.latency_ms / 1000)
+        match = re.fullmatch(r"/lead/(\d+)", urlsplit(self.path).path)
+        if not match:
+            return self.send_body("Not found", "text/plain", status=404)
+        i = int(match.group(1))
+        paragraphs = "\n".join(
+            f"  <p>Advertiser {i} helps small businesses grow online. Paragraph {n} describes services, "
+            f"pricing, customers in Kerala and how to book a free consultation.</p>"
+            for n in range(owner.paragraphs)
+        )
+        self.send_body(render(owner.html, name=f"Advertiser {i}", paragraphs=paragraphs))
+
+
+class LeadWebsiteServer(_Server):
+    def __init__(self, latency_ms=100, paragraphs=30):
+        super().__init__(_WebsiteHandler)
+        self.latency_ms = latency_ms
+        self.paragraphs = paragraphs
+        self.html = load_fixture("lead_website.html")
+
+
+# === Forward proxy ===
+
+class _ForwardProxyHandler(_Handler):
+    def do_GET(self):
+        owner = self.owner
+        owner.count_request()
+        if owner.credentials and self.headers.get("Proxy-Authorization") != owner.authorization:
+            self.send_response(407)
+            self.send_header("Proxy-Authenticate", 'Basic realm="fixture"')
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if owner.blocked:
+            return self.send_body("Blocked", "text/plain", status=403)
+        time.sleep(owner.latency_ms / 1000)
+
+        # Plain HTTP proxying: the request line holds the absolute URL.
+        try:
+            with owner.opener.open(self.path, timeout=10) as upstream:
+                status, headers, body = upstream.status, upstream.headers, upstream.read()
+        except urllib.error.HTTPError as e:
+            status, headers, body = e.code, e.headers, e.read()
+        self.send_response(status)
+        self.send_header("Content-Type", headers.get("Content-Type", "text/plain"))
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class ForwardProxyServer(_Server):
+    """Relays plain HTTP requests to the fixtures. blocked=True answers 403 like a flagged IP;
+    credentials=(user, password) requires Basic proxy authentication."""
+
+    def __init__(self, latency_ms=0, blocked=False, credentials=None):
+        super().__init__(_ForwardProxyHandler)
+        self.latency_ms = latency_ms
+        self.blocked = blocked
+        self.credentials = credentials
+        self.authorization = "Basic " + base64.b64encode(":".join(credentials).encode()).decode() if credentials else None
+        # Straight to the upstream, whatever proxy the environment sets.
+        self.opener = urllib.request.build_opener(urllib.request.ProxyHandler({}))
+
+    def proxy_url(self):
+        """The URL to put in SCRAPER_PROXIES, with the credentials if any."""
+        host, port = self.httpd.server_address[:2]
+        userinfo = f"{self.credentials[0]}:{self.credentials[1]}@" if self.credentials else ""
+        return f"http://{userinfo}{host}:{port}"
@@ -0,0 +1,273 @@
+# run_benchmark.py
+#
+# End-to-end offline benchmark: harvests links from the fixture Ad Library,
+# scrapes every fixture page profile and enriches the leads against the mock
+# LLM and fake lead websites.
+#
+#   python benchmarks/run_benchmark.py --pages 100 --save-baseline default
+#   python benchmarks/run_benchmark.py --pages 100 --compare default
+#   python benchmarks/run_benchmark.py --seed-links --backend http   # profiles and enrichment only
+#
+# Exits 1 when fewer links than --pages were harvested, so a broken harvest
+# cannot pass as a fast one.
+
+import argparse
+import functools
+import json
+import math
+import os
+import queue
+import resource
+import sys
+import tempfile
+import threading
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+BASELINES_DIR = os.path.join(BENCH_DIR, "baselines")
+sys.path[:0] = [REPO_DIR, BENCH_DIR]
+
+from fixture_servers import FacebookFixtureServer, MockLLMServer, LeadWebsiteServer
+
+# Metrics where a higher value is better; everything else is lower-is-better.
+HIGHER_IS_BETTER = {"pages_per_sec"}
+
+
+def percentile(samples, pct):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    # Nearest-rank percentile.
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+class StageTimer:
+    def __init__(self):
+        self.samples = {}
+
+    def wrap(self, stage, fn):
+        @functools.wraps(fn)
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.samples.setdefault(stage, []).append(time.perf_counter() - started)
+        return timed
+
+    def summary(self):
+        return {
+            stage: {
+                "count": len(samples),
+                "p50_s": round(percentile(samples, 50), 4),
+                "p95_s": round(percentile(samples, 95), 4),
+                "p99_s": round(percentile(samples, 99), 4),
+            }
+            for stage, samples in self.samples.items()
+        }
+
+
+class RssSampler:
+    """Peak of scraping_backends.browser_rss_bytes(), the summed RSS of every live browser
+    process, sampled in the background while the pipeline runs."""
+
+    def __init__(self, interval_s=0.2):
+        self.interval_s = interval_s
+        self.peak_bytes = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self):
+        from scraping_backends import browser_rss_bytes
+        while not self._stop.is_set():
+            rss = browser_rss_bytes()
+            if rss is not None:
+                self.peak_bytes = max(self.peak_bytes or 0, rss)
+            self._stop.wait(self.interval_s)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+    def peak_mb(self):
+        return round(self.peak_bytes / 1_048_576, 1) if self.peak_bytes is not None else None
+
+
+def peak_rss_mb():
+    # ru_maxrss is in KiB on Linux. Children only covers processes that have exited
+    # and been waited for, so the browsers have to be closed first; it is the
+    # largest single child, not a sum (see RssSampler for that).
+    self_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children_kb = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return round(self_kb / 1024, 1), round(children_kb / 1024, 1)
+
+
+def run(args):
+    website = LeadWebsiteServer(latency_ms=args.website_latency_ms).start()
+    facebook = FacebookFixtureServer(pages=args.pages, batch_size=args.batch_size, latency_ms=args.latency_ms,
+                                     popup_rate=args.popup_rate, popup_delay_ms=args.popup_delay_ms,
+                                     website_url=website.url).start()
+    llm = MockLLMServer(latency_ms=args.llm_latency_ms).start()
+
+    # Point the OpenAI client (built on first use) and the enrichment budget at the benchmark setup.
+    os.environ["OPENAI_BASE_URL"] = f"{llm.url}/v1"
+    os.environ["OPENAI_API_KEY"] = "benchmark"
+    os.environ["ENRICHMENT_TOKEN_BUDGET"] = str(args.token_budget)
+    os.environ["SCRAPER_METRICS"] = "1"
+    os.environ.pop("SCRAPER_PROXIES", None)
+
+    import ad_scraper
+    import enrichment
+    import profile_scraper
+    import scraping_backends
+    import shared_browser
+    import pandas as pd
+
+    ad_scraper.FACEBOOK_BASE_URL = facebook.url
+    ad_scraper.SCROLL_DELAY_MS = args.scroll_delay_ms
+    ad_scraper.INITIAL_LOAD_WAIT_MS = args.scroll_delay_ms
+
+    timer = StageTimer()
+    ad_scraper.scrape_meta_ads_page_links = timer.wrap("harvest_links", ad_scraper.scrape_meta_ads_page_links)
+    profile_scraper.FacebookPageInfoScraper._scrape_with = timer.wrap(
+        "scrape_page", profile_scraper.FacebookPageInfoScraper._scrape_with)
+    profile_scraper.categorize = timer.wrap("classify", profile_scraper.categorize)
+    enrichment.enrich_lead = timer.wrap("enrich_lead", enrichment.enrich_lead)
+
+    # The pipeline reads and writes master files relative to the working directory.
+    workdir = tempfile.mkdtemp(prefix="lead_bench_")
+    os.chdir(workdir)
+    session = os.path.join(workdir, "data", "session_bench")
+    os.makedirs(session)
+    logger = profile_scraper.setup_logger(os.path.join(session, "scraper.log"))
+    if not args.verbose:
+        logger.setLevel("WARNING")
+    log_list = queue.Queue()
+
+    with RssSampler() as rss_sampler:
+        started = time.perf_counter()
+        if args.seed_links:
+            # Every fixture advertiser, as a complete harvest would have written them.
+            pd.DataFrame([{"Page Name": f"Advertiser {i}", "Page Link": f"{facebook.url}/page{i}"}
+                          for i in range(args.pages)]).to_csv(os.path.join(session, "links.csv"), index=False)
+        else:
+            ad_scraper.run_scrape_page_links("IN", search_keyword="benchmark", data_directory=session,
+                                             logger=logger, log_list=log_list, backend=args.harvest_backend)
+        harvested = time.perf_counter()
+        profile_scraper.process_csv_and_scrape(data_directory=session, logger=logger, log_list=log_list,
+                                               backend=args.backend)
+        finished = time.perf_counter()
+
+    links_path = os.path.join(session, "links.csv")
+    links = len(pd.read_csv(links_path)) if os.path.exists(links_path) else 0
+    leads_path = os.path.join(session, "leads.csv")
+    leads = len(pd.read_csv(leads_path)) if os.path.exists(leads_path) else 0
+    # Close the browsers so RUSAGE_CHILDREN includes them.
+    for backend in {args.backend, args.harvest_backend}:
+        scraping_backends.get_backend(backend).close()
+    shared_browser.close_browser()
+    rss_self, rss_children = peak_rss_mb()
+    with open(os.path.join(session, "metrics.json")) as f:
+        session_metrics = json.load(f)
+
+    for server in (facebook, llm, website):
+        server.stop()
+
+    return {
+        "config": vars(args),
+        "links_harvested": links,
+        "harvest_complete": links == args.pages,
+        "leads": leads,
+        "wall_s": round(finished - started, 2),
+        "harvest_s": round(harvested - started, 2),
+        "profiles_s": round(finished - harvested, 2),
+        "pages_per_sec": round(links / (finished - harvested), 3) if finished > harvested else None,
+        "stages": timer.summary(),
+        "peak_rss_mb": rss_self,
+        "peak_rss_children_mb": rss_children,
+        "peak_browser_rss_mb": rss_sampler.peak_mb(),
+        "llm_calls": llm.requests,
+        "llm_calls_per_lead": round(llm.requests / leads, 2) if leads else None,
+        "session_metrics": session_metrics,
+        "workdir": workdir,
+    }
+
+
+def flatten(result):
+    metrics = {key: value for key, value in result.items()
+               if isinstance(value, (int, float)) and key not in ("links_harvested", "harvest_complete", "leads")}
+    for stage, stats in result.get("stages", {}).items():
+        for key in ("p50_s", "p95_s", "p99_s"):
+            metrics[f"{stage}.{key}"] = stats[key]
+    return metrics
+
+
+def compare(result, baseline, tolerance):
+    """Return the metrics that got worse than the baseline by more than tolerance."""
+    regressions = []
+    current, previous = flatten(result), flatten(baseline)
+    for key, old in previous.items():
+        new = current.get(key)
+        if new is None or not old:
+            continue
+        change = (new - old) / old
+        worse = -change if key in HIGHER_IS_BETTER else change
+        if worse > tolerance:
+            regressions.append(f"{key}: {old} -> {new} ({change:+.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline throughput benchmark for the lead pipeline.")
+    parser.add_argument("--pages", type=int, default=50, help="advertisers in the fixture Ad Library")
+    parser.add_argument("--batch-size", type=int, default=10, help="ad cards per infinite-scroll batch")
+    parser.add_argument("--latency-ms", type=int, default=50, help="fixture Facebook response latency")
+    parser.add_argument("--popup-rate", type=float, default=0.5, help="share of profiles showing a login popup")
+    parser.add_argument("--popup-delay-ms", type=int, default=300)
+    parser.add_argument("--llm-latency-ms", type=int, default=200)
+    parser.add_argument("--website-latency-ms", type=int, default=100)
+    parser.add_argument("--scroll-delay-ms", type=int, default=500)
+    parser.add_argument("--token-budget", type=int, default=10**9)
+    parser.add_argument("--backend", help="engine for page profiles (default SCRAPER_BACKEND)")
+    parser.add_argument("--harvest-backend", help="engine for the Ad Library (default SCRAPER_HARVEST_BACKEND)")
+    parser.add_argument("--seed-links", action="store_true",
+                        help="write links.csv for every fixture page instead of harvesting; profiles and enrichment only")
+    parser.add_argument("--save-baseline", metavar="NAME")
+    parser.add_argument("--compare", metavar="NAME")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    result = run(args)
+    print(json.dumps(result, indent=2))
+
+    # A harvest that stops early makes every later number look better than it is.
+    if not result["harvest_complete"]:
+        print(f"Harvested {result['links_harvested']} of {args.pages} links; not saving or comparing this run.")
+        sys.exit(1)
+
+    if args.save_baseline:
+        os.makedirs(BASELINES_DIR, exist_ok=True)
+        path = os.path.join(BASELINES_DIR, f"{args.save_baseline}.json")
+        with open(path, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"Baseline saved to {path}")
+
+    if args.compare:
+        with open(os.path.join(BASELINES_DIR, f"{args.compare}.json")) as f:
+            baseline = json.load(f)
+        regressions = compare(result, baseline, args.tolerance)
+        if regressions:
+            print("Regressions against baseline:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
+        print(f"No regressions against baseline '{args.compare}'.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,56 @@
-from openai import OpenAI
+from functools import lru_cache
 from tenacity import retry, wait_random_exponential, stop_after_attempt
-from dotenv import load_dotenv
-from bs4 import BeautifulSoup
-from readability import Document
-import requests
 import logging
-load_dotenv()
+import hashlib
+import os
+import threading
+import metrics
 
-client = OpenAI()  # Uses OPENAI_API_KEY from environment automatically
+# openai, requests, readability and bs4 are imported on first use so that importing
+# this module (e.g. from the Streamlit UI) stays cheap and works without an API key.
+
+@lru_cache(maxsize=None)
+def get_client():
+    from dotenv import load_dotenv
+    from openai import OpenAI
+    load_dotenv()
+    return OpenAI()  # Uses OPENAI_API_KEY from environment automatically
+
+@lru_cache(maxsize=None)
+def has_api_key() -> bool:
+    from dotenv import load_dotenv
+    load_dotenv()
+    return bool(os.getenv("OPENAI_API_KEY"))
+
+# Running totals across the process, used to enforce enrichment budgets.
+LLM_USAGE = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+# Per thread as well: scraper sessions run side by side, each in its own thread,
+# and each enforces its own budget.
+_thread_usage = threading.local()
+
+def thread_tokens() -> int:
+    """Tokens used so far by the calling thread."""
+    return getattr(_thread_usage, "total_tokens", 0)
+
+def _chat(system_prompt: str, content: str, stage: str) -> str:
+    with metrics.span(f"llm.{stage}"):
+        response = get_client().chat.completions.create(
+            model="gpt-4-1106-preview",
+            temperature=0.2,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": content},
+            ]
+        )
+    LLM_USAGE["calls"] += 1
+    metrics.increment(f"llm.{stage}.calls")
+    if response.usage:
+        LLM_USAGE["prompt_tokens"] += response.usage.prompt_tokens
+        LLM_USAGE["completion_tokens"] += response.usage.completion_tokens
+        LLM_USAGE["total_tokens"] += response.usage.total_tokens
+        _thread_usage.total_tokens = thread_tokens() + response.usage.total_tokens
+        metrics.increment("llm.tokens", response.usage.total_tokens)
+    return response.choices[0].message.content.strip()
 
 SYSTEM_PROMPT = """You are a lead classification assistant for B2B data enrichment.
 Your task is to classify each company description into **one** of the following categories:
@@ -24,15 +67,7 @@ Only return the category name. Do not explain."""
 
 @retry(wait=wait_random_exponential(min=1, max=5), stop=stop_after_attempt(3))
 def classify(desc):
-    response = client.chat.completions.create(
-        model="gpt-4-1106-preview",
-        temperature=0.2,
-        messages=[
-            {"role": "system", "content": SYSTEM_PROMPT},
-            {"role": "user", "content": desc},
-        ]
-    )
-    return response.choices[0].message.content.strip()
+    return _chat(SYSTEM_PROMPT, desc, "classify")
 
 SYSTEM_PROMPT_SUMMARIZE = """You are a lead enrichment assistant.
 Given the following company website content, provide a concise 1-2 sentence summary of what the company does if the summary of the website is given. Focus on identifying their primary business activity and target audience. Avoid vague descriptions or generic statements. Be specific and to the point."""
@@ -43,30 +78,21 @@ Given the following company summary if there exists one, suggest 1 specific and
 
 @retry(wait=wait_random_exponential(min=1, max=5), stop=stop_after_attempt(3))
 def summarize_website(content: str) -> str:
-    response = client.chat.completions.create(
-        model="gpt-4-1106-preview",
-        temperature=0.2,
-        messages=[
-            {"role": "system", "content": SYSTEM_PROMPT_SUMMARIZE},
-            {"role": "user", "content": content},
-        ]
-    )
-    return response.choices[0].message.content.strip()
+    return _chat(SYSTEM_PROMPT_SUMMARIZE, content, "summarize")
 
 @retry(wait=wait_random_exponential(min=1, max=5), stop=stop_after_attempt(3))
 def generate_sales_insight(summary: str) -> str:
-    response = client.chat.completions.create(
-        model="gpt-4-1106-preview",
-        temperature=0.2,
-        messages=[
-            {"role": "system", "content": SYSTEM_PROMPT_INSIGHT},
-            {"role": "user", "content": summary},
-        ]
-    )
-    return response.choices[0].message.content.strip()
+    return _chat(SYSTEM_PROMPT_INSIGHT, summary, "insight")
 
 def fetch_website_text(url: str) -> str:
+    with metrics.span("enrich.website_fetch"):
+        return _fetch_website_text(url)
+
+def _fetch_website_text(url: str) -> str:
     try:
+        import requests
+        from bs4 import BeautifulSoup
+        from readability import Document
         headers = {"User-Agent": "Mozilla/5.0"}
         res = requests.get(url, timeout=10, headers=headers)
         doc = Document(res.text)
@@ -76,18 +102,27 @@ def fetch_website_text(url: str) -> str:
         return text.strip()[:5000]  # Cap to 5000 chars
     except Exception as e:
         logging.warning(f"Error fetching website: {e}")
+        metrics.increment("enrich.website_fetch_errors")
         return ""
 
+def normalize_website_url(website_url: str) -> str:
+    if website_url and not website_url.startswith("http"):
+        return "https://" + website_url
+    return website_url
+
+def text_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest() if text else ""
+
 def enrich_lead(description: str, website_url: str = None):
     result = {
         "website_summary": "",
-        "sales_insight": ""
+        "sales_insight": "",
+        "website_hash": ""
     }
 
     if website_url:
-        if not website_url.startswith("http"):
-            website_url = "https://" + website_url
-        content = fetch_website_text(website_url)
+        content = fetch_website_text(normalize_website_url(website_url))
+        result["website_hash"] = text_hash(content)
         if content:
             summary = summarize_website(content)
             result["website_summary"] = summary
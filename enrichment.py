@@ -0,0 +1,108 @@
+# enrichment.py
+
+import argparse
+import logging
+import os
+
+import pandas as pd
+
+from classifier_llm import enrich_lead, has_api_key, thread_tokens
+import metrics
+
+# === Configuration ===
+ENRICHMENT_TOKEN_BUDGET = int(os.getenv("ENRICHMENT_TOKEN_BUDGET", "50000"))
+PRICE_PER_1K_TOKENS = float(os.getenv("LLM_PRICE_PER_1K_TOKENS", "0.01"))
+GRADE_ORDER = ["A", "B", "C", "D", "E"]
+
+STATUS_DONE = "done"
+STATUS_PENDING = "pending"
+STATUS_SKIPPED = "skipped"   # nothing to enrich from (no intro or no website)
+
+
+def _is_enrichable(lead) -> bool:
+    return bool(_text(lead.get("intro_desc"))) and bool(_text(lead.get("websites")))
+
+
+def _text(value) -> str:
+    return "" if value is None or pd.isna(value) else str(value).strip()
+
+
+def enrich_by_grade(leads, logger, log_list=None, token_budget=ENRICHMENT_TOKEN_BUDGET, grades=GRADE_ORDER):
+    """Enrich lead dicts in place, best grades first, until the token budget is spent.
+
+    Leads that did not fit in the budget keep enrichment_status "pending" and can be
+    enriched later with `python enrichment.py`.
+    """
+    spent = 0
+    enriched = 0
+    order = sorted((lead for lead in leads if lead.get("grade") in grades),
+                   key=lambda lead: GRADE_ORDER.index(lead["grade"]))
+
+    for lead in leads:
+        if lead.get("enrichment_status") != STATUS_DONE:
+            lead["enrichment_status"] = STATUS_PENDING if _is_enrichable(lead) else STATUS_SKIPPED
+
+    if not has_api_key():
+        logger.warning("OPENAI_API_KEY is not set, leaving every lead pending.")
+        order = []
+
+    for lead in order:
+        if lead["enrichment_status"] != STATUS_PENDING:
+            continue
+        # Stop once the budget is used up (a budget of 0 enriches nothing), or the
+        # next lead would probably not fit in what is left.
+        average = spent / enriched if enriched else 0
+        if spent >= token_budget or spent + average > token_budget:
+            break
+
+        before = thread_tokens()
+        try:
+            with metrics.span("enrich.lead"):
+                result = enrich_lead(_text(lead.get("intro_desc")), _text(lead.get("websites")))
+        except Exception as e:
+            logger.warning(f"Enrichment failed for {lead.get('facebook_url')}: {e}")
+            continue
+        spent += thread_tokens() - before
+        enriched += 1
+        lead["website_summary"] = result["website_summary"]
+        lead["sales_insight"] = result["sales_insight"]
+        lead["website_hash"] = result["website_hash"]
+        lead["enrichment_status"] = STATUS_DONE
+
+    pending = sum(1 for lead in leads if lead["enrichment_status"] == STATUS_PENDING)
+    message = (f"Enriched {enriched} leads for {spent} tokens (~${spent / 1000 * PRICE_PER_1K_TOKENS:.2f}), "
+               f"{pending} left pending (budget {token_budget} tokens).")
+    logger.info(message)
+    if log_list is not None:
+        log_list.put(message)
+    return spent
+
+
+def enrich_pending(csv_path, logger, token_budget=ENRICHMENT_TOKEN_BUDGET, grades=GRADE_ORDER):
+    """Spend another budget on the pending leads of a saved lead table."""
+    df = pd.read_csv(csv_path, dtype=str, keep_default_na=False)
+    for column in ("website_summary", "sales_insight", "enrichment_status", "website_hash"):
+        if column not in df.columns:
+            df[column] = ""
+    # Older tables have no status column; rows that already have a summary are done.
+    df.loc[(df["enrichment_status"] == "") & (df["website_summary"] != ""), "enrichment_status"] = STATUS_DONE
+
+    leads = df.to_dict("records")
+    spent = enrich_by_grade(leads, logger, token_budget=token_budget, grades=grades)
+    df = pd.DataFrame(leads)
+    df.to_csv(csv_path, index=False)
+    xlsx_path = os.path.splitext(csv_path)[0] + ".xlsx"
+    if os.path.exists(xlsx_path):
+        df.to_excel(xlsx_path, index=False)
+    return spent
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Enrich pending leads, best grades first.")
+    parser.add_argument("--csv", default="all_leads.csv")
+    parser.add_argument("--budget", type=int, default=ENRICHMENT_TOKEN_BUDGET, help="token budget for this run")
+    parser.add_argument("--grades", default="".join(GRADE_ORDER), help="grades to consider, e.g. AB")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="[%(asctime)s] %(levelname)s: %(message)s")
+    enrich_pending(args.csv, logging.getLogger("enrichment"), token_budget=args.budget, grades=list(args.grades))
@@ -0,0 +1,174 @@
+# lead_normalizer.py
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+# === Configuration ===
+DEFAULT_COUNTRY = "IN"
+DIAL_CODES = {"IN": "91", "US": "1", "UK": "44", "GB": "44", "UAE": "971", "AE": "971"}
+# Shortest and longest national significant number: Indian toll-free 1800 numbers
+# have 11 digits, UK numbers 9 or 10, UAE landlines 8 next to 9-digit mobiles.
+NATIONAL_LENGTHS = {"91": (10, 11), "1": (10, 10), "44": (9, 10), "971": (8, 9)}
+# Fewer digits than this can't be a phone number at all ("N/A", "123"); anything
+# longer that doesn't parse is kept as written rather than dropped.
+MIN_PHONE_DIGITS = 7
+EXTENSION_PATTERN = r"(?i)\s*(?:ext(?:ension)?|extn|x|#)\.?\s*:?\s*\d{1,6}\s*$"
+WEBSITE_HOST_PATTERN = r"^(?:[a-z0-9.-]+\.[a-z]{2,}|\d{1,3}(?:\.\d{1,3}){3}|localhost)(?::\d+)?(?:/|$)"
+EMAIL_PATTERN = r"^[a-z0-9._%+-]+@[a-z0-9-]+(?:\.[a-z0-9-]+)*\.[a-z]{2,}$"
+PHONE_SEPARATORS = r"\s*[,;/|\n]\s*"
+VALUE_SEPARATORS = r"\s*[,;|\n]\s*"      # no "/" here: it appears inside website URLs
+
+
+def _explode(series, separators=VALUE_SEPARATORS):
+    """One row per value for cells holding several contacts, keyed by the original index."""
+    values = series.fillna("").astype(str)
+    # Most cells hold a single contact; only split the ones that don't.
+    multi = values.str.contains(separators.replace(r"\s*", ""), regex=True)
+    if multi.any():
+        split = values[multi].str.split(separators, regex=True).explode()
+        values = pd.concat([values[~multi], split]).str.strip()
+    return values[values != ""]
+
+
+def _join(values, index):
+    """Inverse of _explode: comma-join the surviving values back onto the original index."""
+    values = values[values != ""]
+    repeated = values.index.duplicated(keep=False)
+    joined = values[~repeated]
+    if repeated.any():
+        # Spread each cell's values into columns and concatenate column by column,
+        # instead of a Python-level join per group.
+        multi = pd.DataFrame({"row": values.index[repeated], "value": values[repeated].to_numpy()}).drop_duplicates()
+        multi["slot"] = multi.groupby("row").cumcount()
+        wide = multi.pivot(index="row", columns="slot", values="value")
+        combined = wide[0]
+        for slot in wide.columns[1:]:
+            combined = combined.where(wide[slot].isna(), combined + ", " + wide[slot])
+        joined = pd.concat([joined, combined])
+    return joined.reindex(index, fill_value="")
+
+
+def normalize_phones(phones, countries):
+    """Phones to E.164 using each row's country for numbers written without a country code.
+
+    Extensions are dropped. A number that doesn't parse is kept as written, so
+    only values with too few digits to be a phone lose the lead its grade.
+    """
+    raw = _explode(phones, PHONE_SEPARATORS)
+    dial = countries.reindex(raw.index).map(DIAL_CODES).fillna(DIAL_CODES[DEFAULT_COUNTRY])
+    lengths = dial.map(NATIONAL_LENGTHS)
+    min_len = lengths.str[0].fillna(0).astype(int)
+    max_len = lengths.str[1].fillna(0).astype(int)
+
+    number = raw.str.replace(EXTENSION_PATTERN, "", regex=True)
+    international = number.str.startswith("+") | number.str.startswith("00")
+    digits = number.str.replace(r"\D", "", regex=True)
+    digits = digits.where(~number.str.startswith("00"), digits.str[2:])
+    national = digits.str.lstrip("0")
+
+    # Only a handful of countries, so compare prefixes one dial code at a time.
+    starts_with_dial = pd.Series(False, index=raw.index)
+    for code in dial.unique():
+        rows = dial == code
+        starts_with_dial[rows] = digits[rows].str.startswith(code)
+    after_code = digits.str.len() - dial.str.len()
+    has_code = starts_with_dial & after_code.ge(min_len) & after_code.le(max_len)
+    is_national = national.str.len().ge(min_len) & national.str.len().le(max_len)
+    e164 = np.select(
+        [international, has_code, is_national],
+        [digits, digits, dial + national],
+        default="",
+    )
+    e164 = pd.Series(e164, index=raw.index)
+    valid = e164.str.len().between(8, 15)
+    unparsed = digits.str.len().between(MIN_PHONE_DIGITS, 15)
+    normalized = ("+" + e164).where(valid, raw.where(unparsed, ""))
+    return _join(normalized, phones.index)
+
+
+def normalize_emails(emails):
+    values = _explode(emails).str.lower().str.strip(".")
+    return _join(values.where(values.str.match(EMAIL_PATTERN), ""), emails.index)
+
+
+def canonicalize_websites(websites):
+    values = _explode(websites).str.lower()
+    values = values.str.replace(r"^[a-z]+://", "", regex=True).str.replace(r"^www\.", "", regex=True)
+    values = values.str.replace(r"[?#].*$", "", regex=True).str.rstrip("/")
+    valid = values.str.match(WEBSITE_HOST_PATTERN)
+    return _join(("https://" + values).where(valid, ""), websites.index)
+
+
+def grade_leads(phones, whatsapp, emails, websites):
+    """Vectorized grade_lead over normalized contact columns."""
+    has_phone, has_whatsapp = phones.ne(""), whatsapp.ne("")
+    has_email, has_website = emails.ne(""), websites.ne("")
+    any_phone = has_phone | has_whatsapp
+    grades = np.select(
+        [has_phone & has_email & has_website & has_whatsapp,
+         any_phone & (has_email | has_website),
+         any_phone,
+         has_email & has_website,
+         has_email | has_website],
+        ["A", "B", "C", "D", "E"],
+        default="F",
+    )
+    return pd.Series(grades, index=phones.index)
+
+
+def flag_duplicates(df):
+    """duplicate_of = the first earlier page sharing any phone, WhatsApp, email or website."""
+    position = pd.Series(np.arange(len(df)), index=df.index)
+    contacts = pd.concat([
+        _explode(df["phones_e164"], ", "), _explode(df["whatsapp_e164"], ", "),
+        _explode(df["emails_normalized"], ", "), _explode(df["website_canonical"], ", "),
+    ])
+    if contacts.empty:
+        return pd.Series("", index=df.index)
+    long = pd.DataFrame({"contact": contacts.values, "position": position.reindex(contacts.index).values},
+                        index=contacts.index)
+    long["first"] = long.groupby("contact")["position"].transform("min")
+    first = long.groupby(level=0)["first"].min().reindex(df.index)
+    is_duplicate = first.notna() & (first < position)
+    urls = df["facebook_url"].to_numpy()
+    duplicate_of = pd.Series("", index=df.index, dtype=object)
+    duplicate_of[is_duplicate] = urls[first[is_duplicate].astype(int).to_numpy()]
+    return duplicate_of
+
+
+def normalize_leads(df, default_country=DEFAULT_COUNTRY):
+    """Add normalized contact columns, recompute grades and flag cross-page duplicates."""
+    # Values are matched back to rows by index, so it has to be unique.
+    df = df.reset_index(drop=True)
+    for column in ("phone_numbers", "whatsapp_numbers", "emails", "websites", "facebook_url"):
+        if column not in df.columns:
+            df[column] = ""
+    countries = df["country"].fillna("").replace("", default_country) if "country" in df.columns \
+        else pd.Series(default_country, index=df.index)
+
+    df["phones_e164"] = normalize_phones(df["phone_numbers"], countries)
+    df["whatsapp_e164"] = normalize_phones(df["whatsapp_numbers"], countries)
+    df["emails_normalized"] = normalize_emails(df["emails"])
+    df["website_canonical"] = canonicalize_websites(df["websites"])
+    df["grade"] = grade_leads(df["phones_e164"], df["whatsapp_e164"], df["emails_normalized"], df["website_canonical"])
+    df["duplicate_of"] = flag_duplicates(df)
+    return df
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Normalize contacts, re-grade and flag duplicates over a lead table.")
+    parser.add_argument("--csv", default="all_leads.csv")
+    parser.add_argument("--out", help="defaults to overwriting --csv")
+    parser.add_argument("--country", default=DEFAULT_COUNTRY, help="country for rows without one")
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.csv, dtype=str, keep_default_na=False)
+    started = time.perf_counter()
+    df = normalize_leads(df, args.country)
+    elapsed = time.perf_counter() - started
+    df.to_csv(args.out or args.csv, index=False)
+    print(f"Normalized {len(df)} rows in {elapsed:.2f}s: grades {df['grade'].value_counts().sort_index().to_dict()}, "
+          f"{(df['duplicate_of'] != '').sum()} duplicates flagged.")
@@ -0,0 +1,152 @@
+# local_classifier.py
+
+import argparse
+import logging
+import os
+import time
+
+import pandas as pd
+
+from classifier_llm import classify, has_api_key
+import metrics
+
+# scikit-learn and joblib are imported on first use; they dominate import time.
+
+# === Configuration ===
+LABELLED_LEADS_CSV = "all_leads.csv"
+MODEL_PATH = os.getenv("LOCAL_CLASSIFIER_PATH", "models/category_classifier.joblib")
+CONFIDENCE_THRESHOLD = float(os.getenv("LOCAL_CLASSIFIER_THRESHOLD", "0.6"))
+MIN_TRAINING_ROWS = 50
+
+# Stored next to each category in category_source, so training only ever sees LLM labels.
+SOURCE_LLM = "llm"
+SOURCE_LOCAL = "local"
+
+_model = None
+_model_mtime = None
+
+
+def load_labelled_rows(csv_path=LABELLED_LEADS_CSV):
+    """Rows whose category came from the LLM; the model's own predictions are left out."""
+    columns = ["intro_desc", "category", "category_source"]
+    df = pd.read_csv(csv_path, usecols=lambda column: column in columns, dtype=str, keep_default_na=False)
+    # Tables written before category_source existed only hold LLM labels.
+    if "category_source" in df.columns:
+        df = df[df["category_source"].isin([SOURCE_LLM, ""])]
+    df["intro_desc"] = df["intro_desc"].str.strip()
+    df["category"] = df["category"].str.strip()
+    return df[(df["intro_desc"] != "") & (df["category"] != "")]
+
+
+def build_model():
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import make_pipeline
+    return make_pipeline(
+        TfidfVectorizer(ngram_range=(1, 2), min_df=2, sublinear_tf=True),
+        LogisticRegression(max_iter=1000, class_weight="balanced"),
+    )
+
+
+def train(csv_path=LABELLED_LEADS_CSV, model_path=MODEL_PATH):
+    """Fit the model on the LLM labels stored in the lead table and save it."""
+    df = load_labelled_rows(csv_path)
+    if len(df) < MIN_TRAINING_ROWS or df["category"].nunique() < 2:
+        raise ValueError(f"Need at least {MIN_TRAINING_ROWS} labelled rows over 2+ categories, got {len(df)}.")
+    model = build_model()
+    model.fit(df["intro_desc"], df["category"])
+    os.makedirs(os.path.dirname(model_path) or ".", exist_ok=True)
+    import joblib
+    joblib.dump(model, model_path)
+    return model, len(df)
+
+
+def get_model(model_path=MODEL_PATH):
+    """Load the saved model once, reloading it if a retrain replaced the file."""
+    global _model, _model_mtime
+    if not os.path.exists(model_path):
+        return None
+    mtime = os.path.getmtime(model_path)
+    if _model is None or mtime != _model_mtime:
+        import joblib
+        _model = joblib.load(model_path)
+        _model_mtime = mtime
+    return _model
+
+
+def predict_batch(texts, model=None):
+    """Return (categories, confidences) for a list of descriptions."""
+    model = model or get_model()
+    if model is None or not len(texts):
+        return [None] * len(texts), [0.0] * len(texts)
+    probabilities = model.predict_proba(list(texts))
+    best = probabilities.argmax(axis=1)
+    return list(model.classes_[best]), list(probabilities.max(axis=1))
+
+
+def categorize(desc, threshold=CONFIDENCE_THRESHOLD):
+    """Local model first; ask the LLM only when the model is missing or unsure.
+
+    Returns (category, source) with source SOURCE_LOCAL or SOURCE_LLM, or ("", "")
+    when neither can label it: the lead is kept uncategorized rather than lost.
+    """
+    categories, confidences = predict_batch([desc])
+    if categories[0] is not None and confidences[0] >= threshold:
+        return categories[0], SOURCE_LOCAL
+    if not has_api_key():
+        metrics.increment("classify.skipped_no_key")
+        return "", ""
+    try:
+        return classify(desc), SOURCE_LLM
+    except Exception as e:
+        logging.warning(f"LLM classification failed, leaving the category empty: {e}")
+        metrics.increment("classify.errors")
+        return "", ""
+
+
+def evaluate(csv_path=LABELLED_LEADS_CSV, threshold=CONFIDENCE_THRESHOLD, test_size=0.2):
+    """Hold out part of the LLM-labelled rows and compare the local model against them."""
+    from sklearn.model_selection import train_test_split
+    df = load_labelled_rows(csv_path)
+    stratify = df["category"] if df["category"].value_counts().min() >= 2 else None
+    train_df, test_df = train_test_split(df, test_size=test_size, random_state=42, stratify=stratify)
+    model = build_model()
+    model.fit(train_df["intro_desc"], train_df["category"])
+
+    started = time.perf_counter()
+    categories, confidences = predict_batch(test_df["intro_desc"].tolist(), model=model)
+    batch_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for text in test_df["intro_desc"].head(200):
+        predict_batch([text], model=model)
+    single_s = (time.perf_counter() - started) / min(len(test_df), 200)
+
+    results = test_df.assign(predicted=categories, confidence=confidences)
+    results["correct"] = results["predicted"] == results["category"]
+    confident = results[results["confidence"] >= threshold]
+    return {
+        "train_rows": len(train_df),
+        "test_rows": len(test_df),
+        "accuracy": round(results["correct"].mean(), 4),
+        "coverage_at_threshold": round(len(confident) / len(results), 4),
+        "accuracy_at_threshold": round(confident["correct"].mean(), 4) if len(confident) else None,
+        "batch_us_per_row": round(batch_s / len(test_df) * 1e6, 1),
+        "single_us_per_row": round(single_s * 1e6, 1),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local category classifier trained from cached LLM labels.")
+    parser.add_argument("command", choices=["retrain", "evaluate"])
+    parser.add_argument("--csv", default=LABELLED_LEADS_CSV)
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--threshold", type=float, default=CONFIDENCE_THRESHOLD)
+    args = parser.parse_args()
+
+    if args.command == "retrain":
+        _, rows = train(args.csv, args.model)
+        print(f"Trained on {rows} rows, saved to {args.model}")
+    else:
+        for key, value in evaluate(args.csv, args.threshold).items():
+            print(f"{key}: {value}")
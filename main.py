@@ -1,38 +1,91 @@
-import pandas as pd 
-from playwright.sync_api import sync_playwright
 from datetime import datetime as dt
+import functools
+import glob
+import hashlib
+import itertools
 import os
 import streamlit as st
-import threading
 import zipfile
-import matplotlib
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
 
-from profile_scraper import process_csv_and_scrape, setup_logger
-from ad_scraper import run_scrape_page_links
+import metrics
 
 from datetime import date
 import time
 import queue
 
+# pandas, playwright and the scraping pipeline are imported where they are used,
+# so a rerun of this script only pays for Streamlit itself.
+PREVIEW_COLUMNS = ["Business_Name", "category", "phone_numbers", "whatsapp_numbers", "emails", "websites", "grade"]
+ARCHIVE_DIR = "archive"
+# Sessions that can scrape at once; each worker thread keeps its own browser.
+SCRAPER_WORKERS = int(os.getenv("SCRAPER_WORKERS", "2"))
+
+load_dotenv()
+
+
+@st.cache_resource
+def scrape_worker():
+    """Long-lived threads shared by all tabs, so their browsers (shared_browser) survive reruns."""
+    return ThreadPoolExecutor(max_workers=SCRAPER_WORKERS, thread_name_prefix="scraper")
+
+
+def new_session_folder():
+    """data/session_<minute>, with a counter when another search already started that minute."""
+    timestamp = dt.now().strftime("%d-%m-%y | %H:%M")
+    os.makedirs("data", exist_ok=True)
+    for n in itertools.count(1):
+        archive_name = f"session_{timestamp}" + (f" ({n})" if n > 1 else "")
+        try:
+            os.mkdir(f"data/{archive_name}")
+        except FileExistsError:
+            continue
+        return f"data/{archive_name}", archive_name
 
 
 def run_session():
-    global folder_name, archive_name
-    now = dt.now()
-    timestamp = now.strftime("%d-%m-%y | %H:%M")
-    folder_name = f"data/session_{timestamp}"
-    archive_name = f"session_{timestamp}"
-    os.makedirs(folder_name, exist_ok=True)
+    from profile_scraper import process_csv_and_scrape, setup_logger
+    from ad_scraper import run_scrape_page_links
+
+    folder_name, archive_name = new_session_folder()
     logger = setup_logger(f"{folder_name}/scraper.log")
+    metrics.reset()
+    metrics.start_http_server()
 
     run_scrape_page_links(country_code,search_keyword=search_keyword, start_date_min=start_date,
                            start_date_max=end_date, data_directory= folder_name,logger = logger,log_list = log_lines)
-    
-    links_path = os.path.join(folder_name,"links.csv")
-
-    total_links = len(pd.read_csv(links_path))
 
-    process_csv_and_scrape(data_directory=folder_name,logger=logger,log_list=log_lines)
+    process_csv_and_scrape(data_directory=folder_name,logger=logger,log_list=log_lines,country_code=country_code,
+                           lead_list=lead_lines)
+    return folder_name, archive_name
+
+
+def session_fingerprint(folder):
+    """Changes whenever a file in the session folder is added, removed or rewritten."""
+    digest = hashlib.sha1()
+    for name in sorted(os.listdir(folder)):
+        stat = os.stat(os.path.join(folder, name))
+        digest.update(f"{name}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()[:12]
+
+
+def session_archive(folder, name):
+    """Called by the download button on click; the ZIP is built once per folder state and reused."""
+    zip_path = os.path.join(ARCHIVE_DIR, f"{name}_{session_fingerprint(folder)}.zip")
+    if not os.path.exists(zip_path):
+        os.makedirs(ARCHIVE_DIR, exist_ok=True)
+        with zipfile.ZipFile(zip_path + ".part", "w", zipfile.ZIP_DEFLATED) as zipf:
+            for file in sorted(os.listdir(folder)):
+                # XLSX files are zip archives already; deflating them again only costs time.
+                compress_type = zipfile.ZIP_STORED if file.endswith(".xlsx") else zipfile.ZIP_DEFLATED
+                zipf.write(os.path.join(folder, file), arcname=file, compress_type=compress_type)
+        os.replace(zip_path + ".part", zip_path)
+        for old in glob.glob(os.path.join(ARCHIVE_DIR, f"{glob.escape(name)}_*.zip")):
+            if old != zip_path:
+                os.remove(old)
+    with open(zip_path, "rb") as f:
+        return f.read()
 
 
 st.set_page_config(page_title="LeadSphere", layout="centered")
@@ -60,6 +113,10 @@ with st.sidebar:
 
     start_button = st.button("Search")
 
+    if not os.getenv("OPENAI_API_KEY"):
+        st.warning("OPENAI_API_KEY is not set: leads are scraped, but those the local classifier can't label get "
+                   "no category, and enrichment is left pending.")
+
 pie_column, legend_column = st.columns(2)
 with pie_column:
     pie_placeholder = st.empty()
@@ -88,59 +145,79 @@ def render_logs(log_lines):
     """
     log_placeholder.markdown(styled_log_box, unsafe_allow_html=True)
 
+results_header = st.empty()
+results_placeholder = st.empty()
+
+def render_grades(grades):
+    import matplotlib.pyplot as plt
+    figure = grades.value_counts().sort_index().plot.pie(
+        autopct="%1.1f%%", figsize=(6, 6), title="Grade Distribution").figure
+    pie_placeholder.pyplot(figure)
+    plt.close(figure)
+    pie_legend.markdown(
+        "**Legend:**\n\n"
+        "- Grade A: Has Phone,Whatsapp, Email, Website\n"
+        "- Grade B: Has either Phone or Whatsapp and one of Email, Website\n"
+        "- Grade C: Has Phone or Whatsapp only\n"
+        "- Grade D: Has only Email and Website\n"
+        "- Grade E: Has either of Email or Website\n"
+    )
+
 if start_button:
     if not search_keyword:
         st.warning("Please enter Search Keyword.")
     else:
         log_lines = queue.Queue()
-        threading.Thread(target=run_session,daemon=True).start()
+        lead_lines = queue.Queue()
+        session = scrape_worker().submit(run_session)
+        leads = []
+        time.sleep(0.1)   # a free worker picks the session up right away
+        if not session.running() and not session.done():
+            render_logs([f"All {SCRAPER_WORKERS} scrapers are busy with other searches; yours is queued and starts when one is free."])
         while True:
             logs_to_render = []
-            try:
+            while not log_lines.empty():
                 logs_to_render.append(log_lines.get_nowait())
+            if logs_to_render:
                 render_logs(logs_to_render)
-            except queue.Empty:
-                pass
-            if not threading.active_count() > 5:  # Only one background thread running
+
+            # Show leads as they are scraped; enrichment fills in the rest at the end.
+            new_leads = []
+            while not lead_lines.empty():
+                new_leads.append(lead_lines.get_nowait())
+            if new_leads:
+                import pandas as pd
+                leads.extend(new_leads)
+                live_df = pd.DataFrame(leads)
+                results_header.subheader(f"Leads found so far: {len(leads)}")
+                results_placeholder.dataframe(live_df[[col for col in PREVIEW_COLUMNS if col in live_df.columns]])
+                render_grades(live_df["grade"])
+
+            if session.done():
                 render_logs(["Done ... ",])
                 break
-            
+
             time.sleep(0.6)
-        
-        csv_path = os.path.join(folder_name,"leads_final.csv")
-        if os.path.exists(csv_path):
-            df = pd.read_csv(csv_path)
-
-            st.subheader("Generated Leads Preview")
-            st.dataframe(df.head())
-
-            if "grade" in df.columns:
-                grade_counts = df["grade"].value_counts()
-                pie_placeholder.pyplot(
-                    grade_counts.plot.pie(autopct="%1.1f%%", figsize=(6, 6), title="Grade Distribution").figure
-                )
-                pie_legend.markdown(
-                    "**Legend:**\n\n"
-                    "- Grade A: Has Phone,Whatsapp, Email, Website\n"
-                    "- Grade B: Has either Phone or Whatsapp and one of Email, Website\n"
-                    "- Grade C: Has Phone or Whatsapp only\n"
-                    "- Grade D: Has only Email and Website\n"
-                    "- Grade E: Has either of Email or Website\n"
-                )
 
-            # ---- Zip & Download ----
-            zip_path = os.path.join("archive", f"{archive_name}.zip")
-            with zipfile.ZipFile(zip_path, 'w') as zipf:
-                for file in os.listdir(f"{folder_name}"):
-                    file_path = os.path.join(f"{folder_name}", file)
-                    zipf.write(file_path, arcname=file)
+        if session.exception():
+            st.error(f"Scraping failed: {session.exception()}")
+        else:
+            folder_name, archive_name = session.result()
+            csv_path = os.path.join(folder_name,"leads_final.csv")
+            if os.path.exists(csv_path):
+                import pandas as pd
+                df = pd.read_csv(csv_path, usecols=lambda column: column in PREVIEW_COLUMNS)
+
+                results_header.subheader("Generated Leads Preview")
+                results_placeholder.dataframe(df)
 
-            with open(zip_path, "rb") as f:
+                if "grade" in df.columns:
+                    render_grades(df["grade"])
+
+                # ---- Zip & Download ----
                 st.download_button(
                     label="Download Session ZIP",
-                    data=f,
+                    data=functools.partial(session_archive, folder_name, archive_name),
                     file_name="session_output.zip",
                     mime="application/zip"
-                )      
-
-
+                )
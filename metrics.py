@@ -0,0 +1,209 @@
+# metrics.py
+#
+# Lightweight per-session timing spans and counters. Off by default: span()
+# then returns a shared no-op object, so instrumented code pays one function
+# call and an attribute lookup.
+#
+# Each scraper session runs in its own thread; reset() gives that thread a fresh
+# set of metrics, so sessions running side by side don't see each other's spans.
+# Prometheus is served the running totals of the whole process.
+#
+#   SCRAPER_METRICS=1          collect and write metrics.json into the session folder
+#   SCRAPER_METRICS_PORT=9108  also serve them as Prometheus text on /metrics
+
+import json
+import os
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+METRICS_ENV = "SCRAPER_METRICS"
+METRICS_PORT_ENV = "SCRAPER_METRICS_PORT"
+BUCKETS_S = (0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_enabled = os.getenv(METRICS_ENV, "").lower() in ("1", "true", "yes") or bool(os.getenv(METRICS_PORT_ENV))
+_server = None
+
+
+class Histogram:
+    def __init__(self):
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+        self.buckets = [0] * len(BUCKETS_S)
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        for i, bound in enumerate(BUCKETS_S):
+            if value <= bound:
+                self.buckets[i] += 1
+                break
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "sum_s": round(self.sum, 4),
+            "mean_s": round(self.sum / self.count, 4) if self.count else None,
+            "min_s": round(self.min, 4) if self.min is not None else None,
+            "max_s": round(self.max, 4) if self.max is not None else None,
+            "buckets": {str(bound): n for bound, n in zip(BUCKETS_S, self.buckets)},
+        }
+
+
+class _Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.counters = {}
+
+    def observe(self, name, seconds):
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(seconds)
+
+    def increment(self, name, value):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+
+_totals = _Registry()    # everything since the process started, for Prometheus
+_shared = _Registry()    # threads that never called reset()
+_local = threading.local()
+
+
+def _session():
+    return getattr(_local, "registry", _shared)
+
+
+class _Span:
+    __slots__ = ("name", "started")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, time.perf_counter() - self.started)
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def enable(flag=True):
+    global _enabled
+    _enabled = flag
+
+
+def is_enabled():
+    return _enabled
+
+
+def span(name):
+    """Time a block: `with metrics.span("profile.navigation"): ...`"""
+    return _Span(name) if _enabled else _NOOP_SPAN
+
+
+def observe(name, seconds):
+    if not _enabled:
+        return
+    _session().observe(name, seconds)
+    _totals.observe(name, seconds)
+
+
+def increment(name, value=1):
+    if not _enabled:
+        return
+    _session().increment(name, value)
+    _totals.increment(name, value)
+
+
+def reset():
+    """Start a new session in the calling thread; other threads keep their metrics."""
+    _local.registry = _Registry()
+
+
+def snapshot():
+    registry = _session()
+    with registry.lock:
+        return {
+            "histograms": {name: h.as_dict() for name, h in sorted(registry.histograms.items())},
+            "counters": dict(sorted(registry.counters.items())),
+        }
+
+
+def write_json(path):
+    if not _enabled:
+        return None
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(snapshot(), f, indent=2)
+    return path
+
+
+def _metric_name(name):
+    return "lead_scraper_" + "".join(c if c.isalnum() else "_" for c in name)
+
+
+def render_prometheus():
+    lines = []
+    with _totals.lock:
+        for name, value in sorted(_totals.counters.items()):
+            metric = _metric_name(name) + "_total"
+            lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+        for name, histogram in sorted(_totals.histograms.items()):
+            metric = _metric_name(name) + "_seconds"
+            lines.append(f"# TYPE {metric} histogram")
+            cumulative = 0
+            for bound, n in zip(BUCKETS_S, histogram.buckets):
+                cumulative += n
+                lines.append(f'{metric}_bucket{{le="{bound}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{le="+Inf"}} {histogram.count}')
+            lines.append(f"{metric}_sum {histogram.sum}")
+            lines.append(f"{metric}_count {histogram.count}")
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_http_server(port=None):
+    """Serve /metrics once per process; later calls return the running server."""
+    global _server
+    port = port or os.getenv(METRICS_PORT_ENV)
+    if _server is not None or not port:
+        return _server
+    _server = ThreadingHTTPServer(("0.0.0.0", int(port)), _MetricsHandler)
+    threading.Thread(target=_server.serve_forever, daemon=True).start()
+    return _server
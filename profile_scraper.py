@@ -2,24 +2,43 @@ from __future__ import annotations
 
 import pandas as pd
 import re
-import random
 import time
 import os
 import asyncio
+import hashlib
+import json
+import threading
+from datetime import datetime
 from typing import Optional
-from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
 import colorlog
 import logging
 
-from classifier_llm import classify
-from classifier_llm import enrich_lead
+from local_classifier import categorize
+from enrichment import enrich_by_grade
+from lead_normalizer import normalize_leads
+import metrics
+from proxy_pool import has_credentials, redact_proxy, shared_pool
+from scraping_backends import get_backend, PageFetchError, INTRO_FIELDS
+from retry_scheduler import (RetryScheduler, FAILURE_TIMEOUT, FAILURE_NAVIGATION, FAILURE_BLOCKED,
+                             FAILURE_EMPTY, FAILURE_ERROR, EMPTY_RETRIES_WITH_PROXIES)
 
 ALL_LEADS_CSV = "all_leads.csv"
 ALL_LEADS_XLSX = "all_leads.xlsx"
+# Concurrent sessions read, merge and rewrite the master table one at a time.
+ALL_LEADS_LOCK = threading.Lock()
+
+# What the old per-page popup check cost: a 5s wait when no popup showed up,
+# and a fixed 1s sleep after closing one. Used to estimate the time saved; the
+# old waits aren't run, so it isn't measured.
+LEGACY_POPUP_TIMEOUT_S = 5.0
+LEGACY_POPUP_SLEEP_S = 1.0
+
 
 def setup_logger(log_file="scraper.log"):
-    logger = colorlog.getLogger("facebook_scraper")
+    # One logger per log file, so sessions running side by side keep their own logs.
+    logger = colorlog.getLogger(f"facebook_scraper.{log_file}")
     logger.setLevel(logging.DEBUG)
+    logger.propagate = False
 
     # Avoid adding multiple handlers if this gets called multiple times
     if not logger.hasHandlers():
@@ -49,208 +68,228 @@ def setup_logger(log_file="scraper.log"):
     return logger
 
 
-def get_random_proxy():
-    proxy_list = [
-        # Add actual proxy URLs or leave blank for direct connection
-    ]
-    return random.choice(proxy_list) if proxy_list else None
+def grade_lead(phone_number, whatsapp_numbers, email, website) -> str:
+    if phone_number and email and website and whatsapp_numbers:
+        return "A"
+    elif (phone_number or whatsapp_numbers) and (email or website):
+        return "B"
+    elif phone_number or whatsapp_numbers:
+        return "C"
+    elif email and website:
+        return "D"
+    elif email or website:
+        return "E"
+    return "F"
+
+
+# Fields whose change means the page needs re-enrichment.
+CONTENT_FIELDS = ["Business_Name", "phone_numbers", "whatsapp_numbers", "emails", "websites", "address", "intro_desc"]
+
+
+def content_hash(record) -> str:
+    payload = json.dumps({field: str(record.get(field) or "").strip() for field in CONTENT_FIELDS}, sort_keys=True)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
 
 
 class FacebookPageInfoScraper:
-    def __init__(self, link: str, logger, log_list, proxy: Optional[str] = None):
+    def __init__(self, link: str, logger, log_list, proxy: Optional[str] = None, backend=None,
+                 classify_leads: bool = True):
         self.link = link
+        self.classify_leads = classify_leads
         self.proxy = proxy
+        self.backend = get_backend(backend)
         self.logger = logger
         self.log_list = log_list
+        self.popups_dismissed = 0
+        self.ready_wait_s = 0.0
+        self.elapsed_s = 0.0
+        self.error = None
+        self.failure = None
+        self.blocked = False
+        self.graded_f = False
+        self.data = None
 
     def scrape(self):
-        with sync_playwright() as p:
-            browser = p.firefox.launch(headless=True, proxy={"server": self.proxy} if self.proxy else None)
-            context = browser.new_context()
-            page = context.new_page()
-
-            try:
-                self.logger.debug(f"Navigating to {self.link} with proxy {self.proxy or 'None'}")
-                self.log_list.put(f"Navigating to {self.link} with proxy {self.proxy or 'None'}")
-                page.goto(self.link, timeout=30000)
-                page.wait_for_selector("body", timeout=10000)
-                self._close_login_popup(page)
-
-                intro_info = self._extract_intro_section_info(page)
-
-                title = (page.title()).replace(" | Facebook", "").strip()
-                followers = self._fetch_followers_count(page)
-                website = intro_info["websites"]
-                email = intro_info["emails"]
-                phone_number =intro_info["phone_numbers"]
-                address=intro_info["address"]
-                intro_desc=intro_info["intro_description"]
-                whatsapp_numbers=intro_info["whatsapp_numbers"]
-
-                category = classify(intro_desc if intro_desc else title)
-                if intro_desc:
-                    enrichment=enrich_lead(intro_desc,website)
-                    website_summary=enrichment["website_summary"]
-                    sales_insight=enrichment["sales_insight"]
-                else:
-                    website_summary=""
-                    sales_insight=""
-
-                if phone_number and email and website and whatsapp_numbers:
-                    grade = "A"
-                elif (phone_number or whatsapp_numbers) and (email or website):
-                    grade = "B"
-                elif phone_number or whatsapp_numbers:
-                    grade = "C"
-                elif email and website:
-                    grade = "D"
-                elif email or website:
-                    grade = "E"
-                else:
-                    grade = "F"
-                
-                data = {
-                    "Business_Name": title,
-                    "category":category,
-                    "facebook_url": self.link,
-                    "phone_numbers": phone_number,
-                    "whatsapp_numbers":whatsapp_numbers,
-                    "emails": email,
-                    "websites": website,
-                    "address":address,
-                    "intro_desc":intro_desc,
-                    "followers": followers,
-                    "grade":grade,
-                    "website_summary":website_summary,
-                    "sales_insight":sales_insight
-                }
-
-                self.logger.info(f"Scraped data: {data}")
-                self.log_list.put(f"Scraped data: {data}")
-                
-                return data if grade != "F" else None
-
-            except Exception as e:
-                self.logger.error(f"Error scraping {self.link}: {e}")
-                self.log_list.put(f"Error scraping {self.link}: {e}")
-                return None
-            finally:
-                browser.close()
+        self.data = self._scrape_with(self.backend)
+        return self.data
 
-    def _close_login_popup(self, page):
-        try:
-            self.logger.debug("Checking for login popup...")
-            self.log_list.put("Checking for login popup...")
-            close_btn = page.wait_for_selector("div[aria-label='Close']", timeout=5000)
-            close_btn.click()
-            self.logger.info("Login popup closed.")
-            self.log_list.put("Login popup closed.")
-            page.wait_for_timeout(1000)
-        except PlaywrightTimeoutError:
-            self.logger.debug("No login popup detected.")
-            self.log_list.put("No login popup detected.")
-
-    def _fetch_followers_count(self, page) -> str:
-        spans = page.query_selector_all("span")
-        for span in spans:
-            text = (span.inner_text()).lower()
-            if "followers" in text:
-                return text.strip()
-        return ""
-
-    def _extract_intro_section_info(self,page):
-        #phones, emails, websites = set(), set(), set()
-        icons_map = {
-            "phone": "Dc7-7AgwkwS.png",
-            "whatsapp": "lnfZfe30sq0.png",
-            "email": "2PIcyqpptfD.png",
-            "website": "BQdeC67wT9z.png",
-            "address": "8k_Y-oVxbuU.png"
-        }
-        info = {"phone_numbers": "", 
-                "whatsapp_numbers": "",
-                "emails": "",
-                "websites": "", 
-                "grade": "",
-                "address": "", 
-                "intro_description": ""}
+    def _scrape_with(self, backend):
+        started = time.monotonic()
         try:
-            elements = page.query_selector_all("div[class*='x1ja2u2z']")
-            self.logger.debug(f"Found {len(elements)} intro section span elements.")
-            self.log_list.put(f"Found {len(elements)} intro section span elements.")
+            self.logger.debug(f"Navigating to {self.link} with proxy {redact_proxy(self.proxy)}")
+            self.log_list.put(f"Navigating to {self.link} with proxy {redact_proxy(self.proxy)}")
+            record, self.ready_wait_s = backend.fetch_page(self.link, self.proxy, on_popup=self._on_popup_closed)
 
-            for i, el in enumerate(elements):
-                try:
-                    img_tag = el.query_selector("img")
-                    if not img_tag:
-                        continue
-                    src = img_tag.get_attribute("src")
-                    next_div = elements[i + 1]
-
-                    if icons_map["phone"] in src:
-                        info["phone_numbers"] = next_div.inner_text().strip()
-
-                    elif icons_map["whatsapp"] in src:
-                        info["whatsapp_numbers"] = next_div.inner_text().strip()
-
-                    elif icons_map["email"] in src:
-                        info["emails"] = next_div.inner_text().strip()
-
-                    elif icons_map["website"] in src:
-                        try:
-                            a = next_div.query_selector("a")
-                            if a:
-                                info["websites"] = a.inner_text().strip()
-                            else:
-                                info["websites"] = next_div.inner_text().strip()
-                        except:
-                            info["websites"] = next_div.inner_text().strip()
-
-                    elif icons_map["address"] in src:
-                        info["address"] = next_div.inner_text().strip()
-
-                except Exception:
-                    continue
-
-            try:
-                intro_desc_elem = page.query_selector("div[class*='x2b8uid'] span")
-                if intro_desc_elem:
-                    info["intro_description"] = intro_desc_elem.inner_text().strip()
-            except Exception as e:
-                self.logger.warning(f"Intro description fallback failed: {e}")
+            if not any(record[field] for field in INTRO_FIELDS):
+                self._fail(FAILURE_EMPTY, "Intro section is empty")
+                return None
+
+            title = record["Business_Name"]
+            website = record["websites"]
+            email = record["emails"]
+            phone_number = record["phone_numbers"]
+            whatsapp_numbers = record["whatsapp_numbers"]
+            intro_desc = record["intro_desc"]
+
+            # Grade from the contacts alone so F pages never reach the LLM.
+            grade = grade_lead(phone_number, whatsapp_numbers, email, website)
+            if grade == "F":
+                self.graded_f = True
+                self.logger.info(f"Grade F, skipping: {self.link}")
+                self.log_list.put(f"Grade F, skipping: {self.link}")
+                return None
+
+            category, category_source = "", ""
+            if self.classify_leads:
+                with metrics.span("profile.classify"):
+                    category, category_source = categorize(intro_desc if intro_desc else title)
+
+            data = {
+                "Business_Name": title,
+                "category":category,
+                "category_source":category_source,
+                "facebook_url": self.link,
+                "phone_numbers": phone_number,
+                "whatsapp_numbers":whatsapp_numbers,
+                "emails": email,
+                "websites": website,
+                "address":record["address"],
+                "intro_desc":intro_desc,
+                "followers": record["followers"],
+                "grade":grade,
+                "website_summary":"",
+                "sales_insight":"",
+                "enrichment_status":""
+            }
+            now = datetime.now().isoformat(timespec="seconds")
+            data.update({"content_hash": content_hash(data), "website_hash": "", "last_seen": now, "last_changed": now})
+
+            self.logger.info(f"Scraped data: {data}")
+            self.log_list.put(f"Scraped data: {data}")
+
+            return data
+
+        except PageFetchError as e:
+            self.blocked = e.kind == FAILURE_BLOCKED
+            self._fail(e.kind, str(e))
+            return None
         except Exception as e:
-            self.logger.warning(f"Intro section scraping issue: {e}")
-            self.log_list.put(f"Intro section scraping issue: {e}")
-        return info
-    
-def process_csv_and_scrape(data_directory:str,logger,log_list):
+            self.error = e
+            self.failure = FAILURE_ERROR
+            self.logger.error(f"Error scraping {self.link}: {e}")
+            self.log_list.put(f"Error scraping {self.link}: {e}")
+            return None
+        finally:
+            self.elapsed_s = time.monotonic() - started
+            metrics.observe("profile.page_total", self.elapsed_s)
+            metrics.increment(f"profile.failures.{self.failure}" if self.failure else "profile.pages_ok")
+
+    def _on_popup_closed(self):
+        self.popups_dismissed += 1
+        metrics.increment("profile.popups_dismissed")
+        self.logger.info("Login popup closed.")
+        self.log_list.put("Login popup closed.")
+
+    def _fail(self, kind, message):
+        self.failure = kind
+        self.error = message
+        self.logger.warning(f"{kind} on {self.link}: {message}")
+        self.log_list.put(f"{kind} on {self.link}: {message}")
+
+
+def scrape_urls(urls, data_directory: str, logger, log_list, classify_leads: bool = True, lead_list=None,
+                backend=None):
+    """Scrape every URL through one backend (SCRAPER_BACKEND by default), retrying transient failures.
+
+    Returns {url: scraper} holding the last attempt for each URL; the scraped
+    record is in scraper.data (None for failures and grade F pages). When
+    lead_list is given, each record is also put on it as soon as it is scraped.
+    """
+    results = {}
+    pages_visited = 0
+    popups_dismissed = 0
+    ready_wait_total = 0.0
+
+    proxy_pool = shared_pool()
+    backend = get_backend(backend)
+    if not backend.proxy_auth and any(has_credentials(proxy) for proxy in proxy_pool.stats):
+        # Fail the session up front rather than every page.
+        raise ValueError(f"The {backend.name} backend can't use proxies with credentials; "
+                         f"remove them from SCRAPER_PROXIES or pick another SCRAPER_BACKEND.")
+    # Empty intros count as suspected blocks below, so with proxies they also get a retry elsewhere.
+    scheduler = RetryScheduler((url for url in urls if url),
+                               empty_retries=EMPTY_RETRIES_WITH_PROXIES if len(proxy_pool) else 0)
+    last_proxy = {}
+
+    while (job := scheduler.next()) is not None:
+        url, attempt = job
+        logger.info(f"Scraping URL: {url}" + (f" (attempt {attempt})" if attempt > 1 else ""))
+        log_list.put(f"Scraping URL: {url}" + (f" (attempt {attempt})" if attempt > 1 else ""))
+        proxy = proxy_pool.acquire(avoid=last_proxy.get(url))
+        last_proxy[url] = proxy
+
+        scraper = FacebookPageInfoScraper(link=url, proxy = proxy,logger=logger,log_list=log_list, backend=backend,
+                                          classify_leads=classify_leads)
+        scraper.scrape()
+        proxy_pool.release(proxy, latency_s=scraper.elapsed_s,
+                           failed=scraper.failure in (FAILURE_TIMEOUT, FAILURE_NAVIGATION),
+                           blocked=scraper.failure in (FAILURE_BLOCKED, FAILURE_EMPTY))
+        if scraper.failure:
+            delay = scheduler.record_failure(url, attempt, scraper.failure, scraper.error)
+            if delay is not None:
+                logger.info(f"Retrying {url} in {delay:.0f}s ({scraper.failure}).")
+                log_list.put(f"Retrying {url} in {delay:.0f}s ({scraper.failure}).")
+        else:
+            scheduler.record_success(url, attempt)
+            if lead_list is not None and scraper.data:
+                lead_list.put(scraper.data)
+        pages_visited += 1
+        popups_dismissed += scraper.popups_dismissed
+        ready_wait_total += scraper.ready_wait_s
+        results[url] = scraper
+
+    for proxy_stats in proxy_pool.snapshot():
+        logger.info(f"Proxy stats: {proxy_stats}")
+
+    failures_df = scheduler.write_report(f"{data_directory}/failures.csv")
+    if failures_df is not None:
+        logger.info(f"Failures report: {failures_df['outcome'].value_counts().to_dict()} written to {data_directory}/failures.csv.")
+        log_list.put(f"{len(failures_df)} URLs failed at least once, see failures.csv.")
+
+    if pages_visited:
+        legacy_wait = (pages_visited - popups_dismissed) * LEGACY_POPUP_TIMEOUT_S + popups_dismissed * LEGACY_POPUP_SLEEP_S
+        logger.info(f"Popup handling: {popups_dismissed} popups closed on {pages_visited} pages, "
+                    f"avg wait for intro {ready_wait_total / pages_visited:.2f}s/page, "
+                    f"estimated ~{legacy_wait:.0f}s saved vs fixed popup waits (not measured).")
+        log_list.put(f"Popup handling: an estimated ~{legacy_wait:.0f}s saved over {pages_visited} pages.")
+
+    return results
+
+
+def process_csv_and_scrape(data_directory:str,logger,log_list, country_code: Optional[str] = None, lead_list=None,
+                           backend=None):
     # Read input CSV with pandas
     try:
         df_input = pd.read_csv(f"{data_directory}/links.csv")
-    except pd.errors.EmptyDataError:
+    except (FileNotFoundError, pd.errors.EmptyDataError):
+        # run_scrape_page_links only writes links.csv when it found new links.
         logger.info(f"There are no new links scraped so ending session.")
         log_list.put(f"There are no new links scraped so ending session.")
-        exit()
-
-    # Define output structure
-    output_data = []
-
-    for _, row in df_input.iterrows():
-        url = str(row.get('Page Link', '')).strip()
-        if not url:
-            continue
-
-        logger.info(f"Scraping URL: {url}")
-        log_list.put(f"Scraping URL: {url}")
-        proxy = get_random_proxy()
+        return
 
-        scraper = FacebookPageInfoScraper(link=url, proxy = proxy,logger=logger,log_list=log_list)
-        scraped_data = scraper.scrape()
+    urls = [str(link).strip() for link in df_input.get('Page Link', pd.Series(dtype=str)).dropna()]
+    results = scrape_urls(urls, data_directory, logger, log_list, lead_list=lead_list, backend=backend)
 
-        if scraped_data:
-            output_data.append(scraped_data)
+    # Define output structure
+    output_data = [scraper.data for scraper in results.values() if scraper.data]
+    for lead in output_data:
+        lead["country"] = country_code or ""
 
     if len(output_data)!=0:
+        with metrics.span("enrichment.session"):
+            enrich_by_grade(output_data, logger, log_list)
+        for lead in output_data:
+            metrics.increment(f"leads.grade_{lead['grade']}")
 
     # Create DataFrame from scraped output
         df_output = pd.DataFrame(output_data)
@@ -267,17 +306,25 @@ def process_csv_and_scrape(data_directory:str,logger,log_list):
         df_output.to_excel(f"{data_directory}/leads.xlsx", index=False)
         df_filtered.to_excel(f"{data_directory}/leads_final.xlsx", index=False)
 
-        if os.path.exists(ALL_LEADS_CSV):
-            try:
-                all_leads = pd.read_csv(ALL_LEADS_CSV)
-                combined_df = pd.concat([all_leads, df_output]).drop_duplicates(subset=["facebook_url"])
-            except:
-                combined_df = df_output
-        combined_df.to_csv(ALL_LEADS_CSV, index=False)
-        combined_df.to_excel(ALL_LEADS_XLSX, index=False)
+        with ALL_LEADS_LOCK:
+            combined_df = df_output
+            if os.path.exists(ALL_LEADS_CSV):
+                try:
+                    all_leads = pd.read_csv(ALL_LEADS_CSV, dtype=str, keep_default_na=False)
+                    combined_df = pd.concat([all_leads, df_output]).drop_duplicates(subset=["facebook_url"])
+                except:
+                    combined_df = df_output
+            # Re-normalize and re-grade the whole master table so dedup flags stay current.
+            with metrics.span("leads.normalize"):
+                combined_df = normalize_leads(combined_df)
+            combined_df.to_csv(ALL_LEADS_CSV, index=False)
+            combined_df.to_excel(ALL_LEADS_XLSX, index=False)
 
         logger.info(f"Done .... Scraped {len(df_output)} leads.")
         log_list.put(f"Done .... Scraped {len(df_output)} leads.")
     else:
         logger.info(f"No Quality Leads found:( ")
-        log_list.put(f"No Quality Leads found:( ")
\ No newline at end of file
+        log_list.put(f"No Quality Leads found:( ")
+
+    if metrics.write_json(f"{data_directory}/metrics.json"):
+        logger.info(f"Session metrics written to {data_directory}/metrics.json.")
\ No newline at end of file
@@ -0,0 +1,125 @@
+# refresh.py
+
+import argparse
+import os
+import queue
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+import metrics
+from classifier_llm import fetch_website_text, normalize_website_url, text_hash
+from enrichment import enrich_by_grade, ENRICHMENT_TOKEN_BUDGET, STATUS_DONE
+from lead_normalizer import normalize_leads
+from local_classifier import categorize
+from profile_scraper import ALL_LEADS_CSV, CONTENT_FIELDS, content_hash, scrape_urls, setup_logger
+
+# === Configuration ===
+REFRESH_TTL_DAYS = 30
+CONTACT_FIELDS = ["phone_numbers", "whatsapp_numbers", "emails", "websites"]
+TRACKING_COLUMNS = ["content_hash", "website_hash", "last_seen", "last_changed", "enrichment_status"]
+
+
+def select_stale(df, ttl_days=REFRESH_TTL_DAYS, now=None):
+    """Rows never seen, or last seen more than ttl_days ago."""
+    now = now or datetime.now()
+    last_seen = pd.to_datetime(df["last_seen"], errors="coerce")
+    return df[last_seen.isna() | (last_seen < now - timedelta(days=ttl_days))]
+
+
+def _website_changed(lead, fresh) -> bool:
+    """Only worth checking for leads that were enriched from an unchanged URL."""
+    if lead.get("enrichment_status") != STATUS_DONE or not fresh["websites"]:
+        return False
+    content = fetch_website_text(normalize_website_url(fresh["websites"]))
+    if not content:
+        return False
+    return text_hash(content) != lead.get("website_hash", "")
+
+
+def refresh_stale_leads(logger, log_list, data_directory, ttl_days=REFRESH_TTL_DAYS, limit=None,
+                        token_budget=ENRICHMENT_TOKEN_BUDGET, csv_path=ALL_LEADS_CSV):
+    df = pd.read_csv(csv_path, dtype=str, keep_default_na=False).drop_duplicates(subset=["facebook_url"])
+    for column in TRACKING_COLUMNS:
+        if column not in df.columns:
+            df[column] = ""
+
+    stale = select_stale(df, ttl_days)
+    if limit:
+        stale = stale.head(limit)
+    logger.info(f"{len(stale)} of {len(df)} leads are older than {ttl_days} days.")
+    log_list.put(f"{len(stale)} of {len(df)} leads are older than {ttl_days} days.")
+    if stale.empty:
+        return df
+
+    results = scrape_urls(stale["facebook_url"].tolist(), data_directory, logger, log_list, classify_leads=False)
+    now = datetime.now().isoformat(timespec="seconds")
+    leads = df.set_index("facebook_url", drop=False).to_dict("index")
+    to_enrich = []
+    counts = {"unchanged": 0, "content_changed": 0, "website_changed": 0, "now_grade_f": 0, "failed": 0}
+
+    for url, scraper in results.items():
+        lead = leads[url]
+        fresh = scraper.data
+        if fresh is None and not scraper.graded_f:
+            counts["failed"] += 1
+            continue
+        lead["last_seen"] = now
+
+        if fresh is None:
+            # Contacts are gone from the page. Blank them too, so the bulk re-grade in
+            # normalize_leads agrees; the rest of the record is kept.
+            lead.update({field: "" for field in CONTACT_FIELDS})
+            lead.update({"grade": "F", "content_hash": "", "last_changed": now})
+            counts["now_grade_f"] += 1
+            continue
+
+        # Old rows have no hash yet; compute it from what was stored so they compare fairly.
+        old_hash = lead["content_hash"] or content_hash(lead)
+        content_changed = fresh["content_hash"] != old_hash
+        website_changed = not content_changed and _website_changed(lead, fresh)
+
+        if not content_changed and not website_changed:
+            lead["content_hash"] = old_hash
+            counts["unchanged"] += 1
+            continue
+
+        counts["content_changed" if content_changed else "website_changed"] += 1
+        lead.update({field: fresh[field] for field in CONTENT_FIELDS + ["grade", "followers", "content_hash"]})
+        lead["last_changed"] = now
+        if content_changed:
+            lead["category"], lead["category_source"] = categorize(fresh["intro_desc"] or fresh["Business_Name"])
+        lead.update({"website_summary": "", "sales_insight": "", "enrichment_status": ""})
+        to_enrich.append(lead)
+
+    logger.info(f"Refresh results: {counts}")
+    log_list.put(f"Refresh results: {counts}")
+    for key, value in counts.items():
+        metrics.increment(f"refresh.{key}", value)
+
+    if to_enrich:
+        enrich_by_grade(to_enrich, logger, log_list, token_budget=token_budget)
+
+    df = pd.DataFrame(list(leads.values()))
+    # Keep the E.164 / canonical columns, grades and duplicate flags in step with the new contacts.
+    with metrics.span("leads.normalize"):
+        df = normalize_leads(df)
+    df.to_csv(csv_path, index=False)
+    df.to_excel(os.path.splitext(csv_path)[0] + ".xlsx", index=False)
+    if metrics.write_json(f"{data_directory}/metrics.json"):
+        logger.info(f"Refresh metrics written to {data_directory}/metrics.json.")
+    return df
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-visit leads older than a TTL and re-enrich only what changed.")
+    parser.add_argument("--ttl-days", type=int, default=REFRESH_TTL_DAYS)
+    parser.add_argument("--limit", type=int, help="refresh at most this many leads")
+    parser.add_argument("--budget", type=int, default=ENRICHMENT_TOKEN_BUDGET, help="token budget for re-enrichment")
+    parser.add_argument("--csv", default=ALL_LEADS_CSV)
+    args = parser.parse_args()
+
+    folder = f"data/refresh_{datetime.now().strftime('%d-%m-%y_%H%M')}"
+    os.makedirs(folder, exist_ok=True)
+    refresh_stale_leads(setup_logger(f"{folder}/scraper.log"), queue.Queue(), folder, ttl_days=args.ttl_days,
+                        limit=args.limit, token_budget=args.budget, csv_path=args.csv)
@@ -0,0 +1,98 @@
+# retry_scheduler.py
+
+import heapq
+import itertools
+import random
+import time
+
+import pandas as pd
+
+# === Failure kinds ===
+FAILURE_TIMEOUT = "timeout"
+FAILURE_NAVIGATION = "navigation"
+FAILURE_BLOCKED = "blocked"
+FAILURE_EMPTY = "extraction_empty"
+FAILURE_ERROR = "error"
+RETRYABLE_FAILURES = {FAILURE_TIMEOUT, FAILURE_NAVIGATION, FAILURE_BLOCKED}
+# An empty intro is usually a page without one, but behind a flagged proxy it can
+# be a soft block; with a proxy pool it gets this many retries on another proxy.
+EMPTY_RETRIES_WITH_PROXIES = 1
+
+# === Configuration ===
+MAX_ATTEMPTS = 3
+BASE_BACKOFF_S = 30
+MAX_BACKOFF_S = 600
+
+# Retries that are due jump ahead of fresh URLs, so they are interleaved with
+# the main pass instead of piling up at the end of it.
+RETRY_PRIORITY = 0
+FRESH_PRIORITY = 1
+
+
+def backoff_delay(attempt, base_s=BASE_BACKOFF_S, max_s=MAX_BACKOFF_S):
+    """Exponential back-off with jitter: half the delay is fixed, half random."""
+    delay = min(max_s, base_s * 2 ** (attempt - 1))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+class RetryScheduler:
+    def __init__(self, urls, max_attempts=MAX_ATTEMPTS, base_backoff_s=BASE_BACKOFF_S, max_backoff_s=MAX_BACKOFF_S,
+                 empty_retries=0):
+        self.max_attempts = max_attempts
+        self.empty_retries = empty_retries
+        self.base_backoff_s = base_backoff_s
+        self.max_backoff_s = max_backoff_s
+        self._seq = itertools.count()
+        self._ready = []      # (priority, seq, url, attempt)
+        self._delayed = []    # (ready_at, seq, url, attempt)
+        self.failures = {}    # url -> report row
+        for url in urls:
+            heapq.heappush(self._ready, (FRESH_PRIORITY, next(self._seq), url, 1))
+
+    def __len__(self):
+        return len(self._ready) + len(self._delayed)
+
+    def next(self):
+        """Return the next (url, attempt) to scrape, sleeping until a retry is due if
+        nothing else is left. Returns None once the queue is drained."""
+        while self._ready or self._delayed:
+            now = time.monotonic()
+            while self._delayed and self._delayed[0][0] <= now:
+                _, seq, url, attempt = heapq.heappop(self._delayed)
+                heapq.heappush(self._ready, (RETRY_PRIORITY, seq, url, attempt))
+            if self._ready:
+                _, _, url, attempt = heapq.heappop(self._ready)
+                return url, attempt
+            time.sleep(max(self._delayed[0][0] - now, 0))
+        return None
+
+    def record_failure(self, url, attempt, kind, message=""):
+        """Re-queue the URL if the failure is retryable. Returns the back-off delay,
+        or None when the URL is given up on."""
+        retryable = kind in RETRYABLE_FAILURES or (kind == FAILURE_EMPTY and self.empty_retries > 0)
+        limit = self.max_attempts if kind in RETRYABLE_FAILURES else min(self.max_attempts, 1 + self.empty_retries)
+        retry = retryable and attempt < limit
+        if retry:
+            outcome = "retrying"
+        elif retryable:
+            outcome = "gave_up"
+        else:
+            outcome = "not_retryable"
+        self.failures[url] = {"url": url, "failure_kind": kind, "attempts": attempt,
+                              "last_error": str(message)[:500], "outcome": outcome}
+        if not retry:
+            return None
+        delay = backoff_delay(attempt, self.base_backoff_s, self.max_backoff_s)
+        heapq.heappush(self._delayed, (time.monotonic() + delay, next(self._seq), url, attempt + 1))
+        return delay
+
+    def record_success(self, url, attempt):
+        if url in self.failures:
+            self.failures[url].update({"attempts": attempt, "outcome": "recovered"})
+
+    def write_report(self, path):
+        if not self.failures:
+            return None
+        df = pd.DataFrame(list(self.failures.values()))
+        df.to_csv(path, index=False)
+        return df
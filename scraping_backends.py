@@ -0,0 +1,566 @@
+# scraping_backends.py
+#
+# One interface over the engines that can drive the scraper:
+#   harvest_ad_links(search_url, ...)  -> [{"Page Name", "Page Link"}, ...]
+#   fetch_page(url, proxy, on_popup)   -> (raw page record, seconds waited for the intro)
+#
+#   SCRAPER_BACKEND           engine for page profiles
+#   SCRAPER_HARVEST_BACKEND   engine for the Ad Library scroll
+#
+#   playwright-firefox    default for both, what the pipeline has always used
+#   playwright-chromium
+#   selenium-chrome       needs selenium (and Chrome)
+#   http                  requests + BeautifulSoup, no JavaScript: profiles only
+#
+# The browser engines share the harvest loop and run the same extraction script
+# in the page, so every engine returns the same record for the same page.
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import metrics
+from proxy_pool import has_credentials, playwright_proxy, redact_proxy
+from retry_scheduler import FAILURE_TIMEOUT, FAILURE_NAVIGATION, FAILURE_BLOCKED
+from shared_browser import get_browser
+
+# === Configuration ===
+SCRAPER_BACKEND = os.getenv("SCRAPER_BACKEND", "playwright-firefox")
+HARVEST_BACKEND = os.getenv("SCRAPER_HARVEST_BACKEND", "playwright-firefox")
+NAVIGATION_TIMEOUT_MS = 30000
+INTRO_WAIT_TIMEOUT_MS = 10000
+HTTP_USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64; rv:128.0) Gecko/20100101 Firefox/128.0"
+
+INTRO_SELECTOR = "div[class*='x1ja2u2z']"
+DESCRIPTION_SELECTOR = "div[class*='x2b8uid'] span"
+ADVERTISER_LINK_CLASS = "xt0psk2"
+# Icon file names the intro section rows are keyed on.
+INTRO_ICONS = {
+    "phone_numbers": "Dc7-7AgwkwS.png",
+    "whatsapp_numbers": "lnfZfe30sq0.png",
+    "emails": "2PIcyqpptfD.png",
+    "websites": "BQdeC67wT9z.png",
+    "address": "8k_Y-oVxbuU.png",
+}
+INTRO_FIELDS = list(INTRO_ICONS) + ["intro_desc"]
+# What extraction reads: any intro row icon or the description. INTRO_SELECTOR
+# alone is a generic class the page shell already has before the intro loads.
+INTRO_READY_SELECTOR = ", ".join([f"img[src*='{icon}']" for icon in INTRO_ICONS.values()] + [DESCRIPTION_SELECTOR])
+RECORD_FIELDS = ["Business_Name", "facebook_url"] + INTRO_FIELDS + ["followers"]
+
+# Injected into every page of a context: closes login/cookie overlays as soon
+# as they are attached instead of polling for them after navigation.
+POPUP_DISMISS_JS = """
+(() => {
+    const clicked = new WeakSet();
+    const dismiss = () => {
+        for (const btn of document.querySelectorAll("div[aria-label='Close']")) {
+            if (clicked.has(btn)) continue;
+            clicked.add(btn);
+            btn.click();
+            window.__leadScraperPopupCount = (window.__leadScraperPopupCount || 0) + 1;
+            if (window.__leadScraperPopupClosed) window.__leadScraperPopupClosed();
+        }
+    };
+    new MutationObserver(dismiss).observe(document, {childList: true, subtree: true});
+})();
+"""
+
+# Reads the whole record in one round trip. Each intro row with a known icon is
+# followed by the row holding its value; websites prefer the link text.
+EXTRACT_RECORD_JS = """
+([introSelector, descriptionSelector, icons]) => {
+    const text = (el) => (el ? el.innerText : "").trim();
+    const record = {};
+    for (const field of Object.keys(icons)) record[field] = "";
+    const rows = Array.from(document.querySelectorAll(introSelector));
+    rows.forEach((row, i) => {
+        const img = row.querySelector("img");
+        const next = rows[i + 1];
+        if (!img || !next) return;
+        const src = img.getAttribute("src") || "";
+        const field = Object.keys(icons).find((key) => src.includes(icons[key]));
+        if (field) record[field] = text(field === "websites" ? next.querySelector("a") || next : next);
+    });
+    record.intro_desc = text(document.querySelector(descriptionSelector));
+    const followers = Array.from(document.querySelectorAll("span"))
+        .find((span) => span.innerText.toLowerCase().includes("followers"));
+    record.followers = followers ? followers.innerText.toLowerCase().trim() : "";
+    return record;
+}
+"""
+
+COLLECT_LINKS_JS = """
+(prefix) => Array.from(document.querySelectorAll(`a[href^='${prefix}']`))
+    .map((a) => [a.getAttribute("href"), a.getAttribute("class") || "", a.innerText.trim()])
+"""
+
+# Replaces every ad card whose advertiser link has already been recorded with an
+# empty placeholder of the same height, so the scroll position and the infinite
+# loader keep working while the DOM stays small. Runs of placeholders are merged.
+#
+# Cards are the subtrees under the results container holding a single advertiser
+# link. The container (the deepest element holding every link) is found once and
+# remembered, and all card roots are chosen before anything is replaced, so the
+# climb can never reach the container, the loader or the app root.
+PRUNE_CARDS_JS = """
+(prefix) => {
+    const selector = `a.xt0psk2[href^='${prefix}']`;
+    const links = Array.from(document.querySelectorAll(selector));
+    let container = window.__leadScraperCardContainer;
+    if (!container || !container.isConnected) {
+        if (links.length < 2) return 0;
+        container = links[0].parentElement;
+        while (container && !links.every((link) => container.contains(link))) container = container.parentElement;
+        if (!container || container === document.body || container === document.documentElement) return 0;
+        window.__leadScraperCardContainer = container;
+    }
+
+    const cards = [];
+    for (const link of links) {
+        if (!container.contains(link)) continue;
+        let card = link;
+        while (card.parentElement !== container && card.parentElement.querySelectorAll(selector).length === 1) {
+            card = card.parentElement;
+        }
+        if (card !== link) cards.push(card);
+    }
+
+    for (const card of cards) {
+        const height = card.offsetHeight;
+        const prev = card.previousElementSibling;
+        if (prev && prev.dataset && prev.dataset.prunedCard) {
+            prev.style.height = (prev.offsetHeight + height) + "px";
+            card.remove();
+        } else {
+            const placeholder = document.createElement("div");
+            placeholder.dataset.prunedCard = "1";
+            placeholder.style.height = height + "px";
+            card.replaceWith(placeholder);
+        }
+    }
+    return cards.length;
+}
+"""
+
+# One harvest round in a single call: the page can't change between reading the
+# links and pruning their cards, so a batch that loads mid-round is never pruned
+# before it has been read.
+HARVEST_ROUND_JS = f"""
+([prefix, prune]) => {{
+    const links = ({COLLECT_LINKS_JS})(prefix);
+    const pruned = prune ? ({PRUNE_CARDS_JS})(prefix) : 0;
+    return {{links, pruned}};
+}}
+"""
+
+# Only Chromium exposes the JS heap size (None elsewhere); browser_rss_bytes()
+# is the per-round memory figure that works for every engine.
+DOM_STATS_JS = """
+() => ({
+    nodes: document.getElementsByTagName("*").length,
+    js_heap_bytes: (performance.memory && performance.memory.usedJSHeapSize) || null,
+})
+"""
+
+
+class PageFetchError(Exception):
+    """A page visit failed in a way the retry scheduler understands (see retry_scheduler.FAILURE_*)."""
+
+    def __init__(self, kind: str, message: str):
+        super().__init__(message)
+        self.kind = kind
+
+
+def is_login_wall(url: str) -> bool:
+    # Facebook answers a flagged IP by redirecting public pages to a login wall.
+    return any(marker in url for marker in ("/login", "/checkpoint"))
+
+
+def browser_rss_bytes():
+    """Resident memory of the browsers (and drivers) started by this process, or None without psutil."""
+    try:
+        import psutil
+    except ImportError:
+        return None
+    total = 0
+    for child in psutil.Process().children(recursive=True):
+        try:
+            total += child.memory_info().rss
+        except psutil.Error:
+            continue
+    return total
+
+
+def page_title(title: str) -> str:
+    return title.replace(" | Facebook", "").strip()
+
+
+class ScrapingBackend:
+    name = ""
+    proxy_auth = True    # whether proxies may carry user:password
+
+    def harvest_ad_links(self, search_url, link_prefix, logger, log_list, existing_links=(),
+                         initial_wait_ms=5000, scroll_delay_ms=3000, prune_harvested=True, scroll_stats=None):
+        """Scroll an Ad Library search to the end and return the new advertiser links."""
+        raise NotImplementedError(f"The {self.name} backend cannot harvest ad links.")
+
+    def fetch_page(self, url, proxy=None, on_popup=None):
+        """Visit a page profile and return (record, seconds spent waiting for the intro section).
+
+        Raises PageFetchError for timeouts, navigation errors and login walls.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """Release what this thread holds (drivers, sessions)."""
+
+
+class BrowserBackend(ScrapingBackend):
+    """Shared logic for engines that render the page; subclasses provide _open_page()."""
+
+    def _open_page(self, proxy=None, on_popup=None):
+        """Context manager yielding a page with goto/wait/wait_for/evaluate/url/title."""
+        raise NotImplementedError
+
+    def _failure_kind(self, error):
+        """FAILURE_TIMEOUT for the engine's timeout errors, None for anything else."""
+        return None
+
+    def harvest_ad_links(self, search_url, link_prefix, logger, log_list, existing_links=(),
+                         initial_wait_ms=5000, scroll_delay_ms=3000, prune_harvested=True, scroll_stats=None):
+        if scroll_stats is None:
+            scroll_stats = []
+        with self._open_page() as page:
+            with metrics.span("ads.navigation"):
+                page.goto(search_url)
+
+            logger.info("Waiting for page to load...")
+            log_list.put("Waiting for page to load...")
+            page.wait(initial_wait_ms)
+
+            advertiser_links = set()
+            advertiser_data = []
+            count = 0
+            skipped = 0
+
+            previous_height = 0
+            scroll_round = 0
+            while True:
+                scroll_round += 1
+                logger.info(f"[Scroll {scroll_round}] Collecting page links...")
+                log_list.put(f"[Scroll {scroll_round}] Collecting page links...")
+                with metrics.span("ads.collect_links"):
+                    harvested = page.evaluate(HARVEST_ROUND_JS, [link_prefix, prune_harvested])
+                    for href, classes, name in harvested["links"]:
+                        if href and ADVERTISER_LINK_CLASS in classes:
+                            clean_href = href.split("?")[0]
+                            if clean_href not in advertiser_links and clean_href not in existing_links:
+                                advertiser_links.add(clean_href)
+                                advertiser_data.append({"Page Name": name, "Page Link": clean_href})
+                                count += 1
+                                logger.info(f"[{count}] New link: {clean_href} | Name: {name}")
+                                log_list.put(f"[{count}] New link: {clean_href} | Name: {name}")
+                            elif clean_href in existing_links:
+                                skipped += 1
+
+                pruned = harvested["pruned"]
+                stats = page.evaluate(DOM_STATS_JS)
+                rss = browser_rss_bytes()
+                heap = f"{stats['js_heap_bytes'] / 1_048_576:.1f} MB" if stats["js_heap_bytes"] else "n/a"
+                scroll_stats.append({"scroll_round": scroll_round, "links": count, "pruned_cards": pruned,
+                                     "dom_nodes": stats["nodes"], "browser_rss_bytes": rss,
+                                     "js_heap_bytes": stats["js_heap_bytes"]})
+                logger.debug(f"[Scroll {scroll_round}] DOM nodes: {stats['nodes']} | "
+                             f"Browser RSS: {f'{rss / 1_048_576:.1f} MB' if rss is not None else 'n/a'} | "
+                             f"JS heap: {heap} | Pruned cards: {pruned}")
+
+                with metrics.span("ads.scroll_wait"):
+                    page.evaluate("() => window.scrollBy(0, document.body.scrollHeight)")
+                    page.wait(scroll_delay_ms)
+                new_height = page.evaluate("() => document.body.scrollHeight")
+                if new_height == previous_height:
+                    logger.info("Reached end of page.")
+                    log_list.put("Reached end of page.")
+                    break
+                previous_height = new_height
+
+        logger.info(f"Skipped {skipped} already-known links.")
+        log_list.put(f"Skipped {skipped} already-known links.")
+        metrics.increment("ads.links_new", count)
+        metrics.increment("ads.links_skipped", skipped)
+        return advertiser_data
+
+    def fetch_page(self, url, proxy=None, on_popup=None):
+        try:
+            with self._open_page(proxy, on_popup) as page:
+                with metrics.span("profile.navigation"):
+                    page.goto(url)
+                started = time.monotonic()
+                with metrics.span("profile.intro_wait"):
+                    page.wait_for(INTRO_READY_SELECTOR, INTRO_WAIT_TIMEOUT_MS)
+                ready_wait_s = time.monotonic() - started
+
+                with metrics.span("profile.intro_extraction"):
+                    record = page.evaluate(EXTRACT_RECORD_JS, [INTRO_SELECTOR, DESCRIPTION_SELECTOR, INTRO_ICONS])
+                if is_login_wall(page.url):
+                    raise PageFetchError(FAILURE_BLOCKED, f"Login wall via proxy {redact_proxy(proxy)}")
+                record.update({"Business_Name": page_title(page.title()), "facebook_url": url})
+                return record, ready_wait_s
+        except PageFetchError:
+            raise
+        except Exception as e:
+            kind = self._failure_kind(e)
+            if kind is None:
+                raise
+            raise PageFetchError(kind, str(e)) from e
+
+
+# === Playwright (Firefox / Chromium) ===
+
+class _PlaywrightPage:
+    def __init__(self, page):
+        self.page = page
+
+    def goto(self, url):
+        from playwright.sync_api import Error as PlaywrightError, TimeoutError as PlaywrightTimeoutError
+        try:
+            self.page.goto(url, timeout=NAVIGATION_TIMEOUT_MS)
+        except PlaywrightTimeoutError as e:
+            raise PageFetchError(FAILURE_TIMEOUT, str(e)) from e
+        except PlaywrightError as e:
+            raise PageFetchError(FAILURE_NAVIGATION, str(e)) from e
+
+    def wait(self, ms):
+        self.page.wait_for_timeout(ms)
+
+    def wait_for(self, selector, timeout_ms) -> bool:
+        from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+        try:
+            self.page.wait_for_selector(selector, state="attached", timeout=timeout_ms)
+            return True
+        except PlaywrightTimeoutError:
+            return False
+
+    def evaluate(self, js, arg=None):
+        return self.page.evaluate(js, arg)
+
+    @property
+    def url(self):
+        return self.page.url
+
+    def title(self):
+        return self.page.title()
+
+
+class PlaywrightBackend(BrowserBackend):
+    def __init__(self, browser_type="firefox"):
+        self.browser_type = browser_type
+        self.name = f"playwright-{browser_type}"
+
+    @contextmanager
+    def _open_page(self, proxy=None, on_popup=None):
+        # One context per page on the thread's shared browser; the proxy is bound per context.
+        context = get_browser(self.browser_type).new_context(proxy=playwright_proxy(proxy))
+        try:
+            if on_popup is not None:
+                context.expose_function("__leadScraperPopupClosed", on_popup)
+                context.add_init_script(POPUP_DISMISS_JS)
+            yield _PlaywrightPage(context.new_page())
+        finally:
+            context.close()
+
+    def _failure_kind(self, error):
+        from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+        return FAILURE_TIMEOUT if isinstance(error, PlaywrightTimeoutError) else None
+
+
+# === Selenium (Chrome) ===
+
+class _SeleniumPage:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def goto(self, url):
+        from selenium.common.exceptions import TimeoutException, WebDriverException
+        try:
+            self.driver.get(url)
+        except TimeoutException as e:
+            raise PageFetchError(FAILURE_TIMEOUT, str(e)) from e
+        except WebDriverException as e:
+            raise PageFetchError(FAILURE_NAVIGATION, str(e)) from e
+
+    def wait(self, ms):
+        time.sleep(ms / 1000)
+
+    def wait_for(self, selector, timeout_ms) -> bool:
+        from selenium.common.exceptions import TimeoutException
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import WebDriverWait
+        try:
+            WebDriverWait(self.driver, timeout_ms / 1000).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, selector)))
+            return True
+        except TimeoutException:
+            return False
+
+    def evaluate(self, js, arg=None):
+        return self.driver.execute_script(f"return ({js})(arguments[0]);", arg)
+
+    @property
+    def url(self):
+        return self.driver.current_url
+
+    def title(self):
+        return self.driver.title
+
+
+class SeleniumChromeBackend(BrowserBackend):
+    """Headless Chrome through Selenium. Chrome takes its proxy at launch, so there is one driver per proxy."""
+
+    name = "selenium-chrome"
+    # Chrome ignores user:password in --proxy-server and has no flag for them.
+    proxy_auth = False
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def _driver(self, proxy=None):
+        drivers = self._local.__dict__.setdefault("drivers", {})
+        if proxy not in drivers:
+            if has_credentials(proxy):
+                raise ValueError(f"{self.name} can't authenticate to proxy {redact_proxy(proxy)}; "
+                                 f"use a proxy without credentials or a playwright engine.")
+            from selenium import webdriver
+            options = webdriver.ChromeOptions()
+            options.add_argument("--headless=new")
+            options.add_argument("--disable-gpu")
+            options.add_argument("--no-sandbox")
+            options.add_argument("--disable-blink-features=AutomationControlled")
+            if proxy:
+                options.add_argument(f"--proxy-server={playwright_proxy(proxy)['server']}")
+            driver = webdriver.Chrome(options=options)
+            driver.set_page_load_timeout(NAVIGATION_TIMEOUT_MS / 1000)
+            driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": POPUP_DISMISS_JS})
+            drivers[proxy] = driver
+        return drivers[proxy]
+
+    @contextmanager
+    def _open_page(self, proxy=None, on_popup=None):
+        driver = self._driver(proxy)
+        try:
+            yield _SeleniumPage(driver)
+            if on_popup is not None:
+                # No callback into Python here; the dismiss script keeps a count instead.
+                for _ in range(driver.execute_script("return window.__leadScraperPopupCount || 0;")):
+                    on_popup()
+        finally:
+            # Stand-in for a fresh context: nothing carries over to the next page.
+            driver.delete_all_cookies()
+
+    def _failure_kind(self, error):
+        from selenium.common.exceptions import TimeoutException
+        return FAILURE_TIMEOUT if isinstance(error, TimeoutException) else None
+
+    def close(self):
+        for driver in self._local.__dict__.pop("drivers", {}).values():
+            driver.quit()
+
+
+# === Plain HTTP ===
+
+class HttpBackend(ScrapingBackend):
+    """Fetches the profile HTML and parses it without a browser.
+
+    Only works where the intro section is in the served HTML; the Ad Library
+    renders its results with JavaScript, so links have to be harvested by a
+    browser backend.
+    """
+
+    name = "http"
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def _session(self):
+        if getattr(self._local, "session", None) is None:
+            import requests
+            self._local.session = requests.Session()
+            self._local.session.headers["User-Agent"] = HTTP_USER_AGENT
+        return self._local.session
+
+    def fetch_page(self, url, proxy=None, on_popup=None):
+        import requests
+        from bs4 import BeautifulSoup
+
+        proxies = {"http": proxy, "https": proxy} if proxy else None
+        try:
+            with metrics.span("profile.navigation"):
+                response = self._session().get(url, timeout=NAVIGATION_TIMEOUT_MS / 1000, proxies=proxies)
+        except requests.Timeout as e:
+            raise PageFetchError(FAILURE_TIMEOUT, str(e)) from e
+        except requests.RequestException as e:
+            raise PageFetchError(FAILURE_NAVIGATION, str(e)) from e
+        if response.status_code in (403, 429) or is_login_wall(response.url):
+            raise PageFetchError(FAILURE_BLOCKED, f"HTTP {response.status_code} via proxy {redact_proxy(proxy)}")
+        if response.status_code >= 500:
+            raise PageFetchError(FAILURE_NAVIGATION, f"HTTP {response.status_code}")
+        # Other error pages are parsed like the browser engines see them: no intro, so empty.
+
+        with metrics.span("profile.intro_extraction"):
+            soup = BeautifulSoup(response.text, "html.parser")
+            record = extract_record_from_html(soup)
+        record.update({"Business_Name": page_title(soup.title.get_text() if soup.title else ""), "facebook_url": url})
+        return record, 0.0
+
+    def close(self):
+        session = getattr(self._local, "session", None)
+        if session is not None:
+            session.close()
+            self._local.session = None
+
+
+def extract_record_from_html(soup):
+    """EXTRACT_RECORD_JS over parsed HTML, for engines without a JavaScript runtime."""
+    text = lambda el: el.get_text(" ", strip=True) if el is not None else ""
+    record = {field: "" for field in INTRO_ICONS}
+    rows = soup.select(INTRO_SELECTOR)
+    for row, next_row in zip(rows, rows[1:]):
+        img = row.find("img")
+        if img is None:
+            continue
+        src = img.get("src") or ""
+        field = next((key for key, icon in INTRO_ICONS.items() if icon in src), None)
+        if field:
+            record[field] = text(next_row.find("a") or next_row if field == "websites" else next_row)
+    record["intro_desc"] = text(soup.select_one(DESCRIPTION_SELECTOR))
+    followers = next((span for span in soup.find_all("span") if "followers" in span.get_text().lower()), None)
+    record["followers"] = text(followers).lower()
+    return record
+
+
+# === Registry ===
+
+BACKENDS = {
+    "playwright-firefox": lambda: PlaywrightBackend("firefox"),
+    "playwright-chromium": lambda: PlaywrightBackend("chromium"),
+    "selenium-chrome": SeleniumChromeBackend,
+    "http": HttpBackend,
+}
+_instances = {}
+_instances_lock = threading.Lock()
+
+
+def get_backend(backend=None) -> ScrapingBackend:
+    """Backend by name (default SCRAPER_BACKEND); backend objects are passed through."""
+    if isinstance(backend, ScrapingBackend):
+        return backend
+    name = backend or SCRAPER_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown scraping backend {name!r}, expected one of {', '.join(BACKENDS)}.")
+    with _instances_lock:
+        if name not in _instances:
+            _instances[name] = BACKENDS[name]()
+        return _instances[name]
@@ -0,0 +1,32 @@
+# shared_browser.py
+
+import threading
+
+from playwright.sync_api import sync_playwright
+
+# Sync Playwright objects may only be used from the thread that created them,
+# so there is one browser per thread (and browser type). A long-lived worker
+# thread (see main.py) therefore keeps the same browser across scraping sessions.
+_local = threading.local()
+
+
+def get_browser(browser_type="firefox"):
+    """Return this thread's headless browser, launching it on first use or after a crash."""
+    browsers = _local.__dict__.setdefault("browsers", {})
+    browser = browsers.get(browser_type)
+    if browser is None or not browser.is_connected():
+        if getattr(_local, "playwright", None) is None:
+            _local.playwright = sync_playwright().start()
+        browser = browsers[browser_type] = getattr(_local.playwright, browser_type).launch(headless=True)
+    return browser
+
+
+def close_browser():
+    """Shut down this thread's browsers and Playwright driver, if any."""
+    for browser in _local.__dict__.pop("browsers", {}).values():
+        if browser.is_connected():
+            browser.close()
+    playwright = getattr(_local, "playwright", None)
+    if playwright is not None:
+        playwright.stop()
+    _local.playwright = None
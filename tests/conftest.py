@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The modules live at the repo root, next to main.py, and aren't installed;
+# the fixture servers (local stand-ins for Facebook, proxies...) are in benchmarks/.
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [REPO_DIR, os.path.join(REPO_DIR, "benchmarks")]
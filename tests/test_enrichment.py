@@ -0,0 +1,51 @@
+import logging
+
+import pytest
+
+import classifier_llm
+import enrichment
+from enrichment import STATUS_DONE, STATUS_PENDING, STATUS_SKIPPED, enrich_by_grade
+
+TOKENS_PER_LEAD = 1000
+
+
+@pytest.fixture(autouse=True)
+def fake_llm(monkeypatch):
+    def enrich_lead(description, website_url=None):
+        classifier_llm._thread_usage.total_tokens = classifier_llm.thread_tokens() + TOKENS_PER_LEAD
+        return {"website_summary": "summary", "sales_insight": "insight", "website_hash": "hash"}
+
+    monkeypatch.setattr(enrichment, "has_api_key", lambda: True)
+    monkeypatch.setattr(enrichment, "enrich_lead", enrich_lead)
+
+
+def leads(grades):
+    return [{"grade": grade, "intro_desc": "We sell shoes.", "websites": "shoes.example"} for grade in grades]
+
+
+def statuses(leads):
+    return [lead["enrichment_status"] for lead in leads]
+
+
+def test_a_zero_budget_enriches_nothing():
+    batch = leads("AB")
+    assert enrich_by_grade(batch, logging.getLogger(), token_budget=0) == 0
+    assert statuses(batch) == [STATUS_PENDING, STATUS_PENDING]
+
+
+def test_best_grades_are_enriched_first_until_the_budget_is_spent():
+    batch = leads("CAB")
+    assert enrich_by_grade(batch, logging.getLogger(), token_budget=2 * TOKENS_PER_LEAD) == 2 * TOKENS_PER_LEAD
+    assert statuses(batch) == [STATUS_PENDING, STATUS_DONE, STATUS_DONE]
+
+
+def test_stops_before_a_lead_that_would_not_fit():
+    batch = leads("AAA")
+    enrich_by_grade(batch, logging.getLogger(), token_budget=int(1.5 * TOKENS_PER_LEAD))
+    assert statuses(batch) == [STATUS_DONE, STATUS_PENDING, STATUS_PENDING]
+
+
+def test_leads_without_a_description_or_website_are_skipped():
+    batch = leads("A") + [{"grade": "A", "intro_desc": "", "websites": "shoes.example"}]
+    enrich_by_grade(batch, logging.getLogger())
+    assert statuses(batch) == [STATUS_DONE, STATUS_SKIPPED]
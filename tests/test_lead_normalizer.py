@@ -0,0 +1,97 @@
+import pandas as pd
+import pytest
+
+from lead_normalizer import canonicalize_websites, normalize_leads, normalize_phones
+
+
+def phones(values, country="IN"):
+    series = pd.Series(values)
+    return normalize_phones(series, pd.Series(country, index=series.index)).tolist()
+
+
+@pytest.mark.parametrize("country, raw, expected", [
+    ("IN", "98765 43210", "+919876543210"),
+    ("IN", "098765 43210", "+919876543210"),
+    ("IN", "91 98765 43210", "+919876543210"),
+    ("IN", "1800 123 4567", "+9118001234567"),
+    ("UAE", "04 123 4567", "+97141234567"),
+    ("UAE", "050 123 4567", "+971501234567"),
+    ("UK", "020 7946 0958", "+442079460958"),
+    ("US", "(415) 555-0132", "+14155550132"),
+])
+def test_national_numbers_use_the_row_country(country, raw, expected):
+    assert phones([raw], country) == [expected]
+
+
+@pytest.mark.parametrize("raw", ["+91 22 1234 5678 ext. 123", "+91 22 1234 5678 x123", "022 1234 5678 #12"])
+def test_extensions_are_dropped(raw):
+    assert phones([raw]) == ["+912212345678"]
+
+
+def test_unparseable_numbers_are_kept_as_written():
+    assert phones(["12-34-56-78"]) == ["12-34-56-78"]
+
+
+def test_values_too_short_to_be_phones_are_blanked():
+    assert phones(["N/A", "123"]) == ["", ""]
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("www.Example.com/", "https://example.com"),
+    ("http://127.0.0.1:8123/lead/3", "https://127.0.0.1:8123/lead/3"),
+    ("shop.example.in:8080", "https://shop.example.in:8080"),
+    ("facebook", ""),
+])
+def test_canonical_websites(raw, expected):
+    assert canonicalize_websites(pd.Series([raw])).tolist() == [expected]
+
+
+@pytest.mark.parametrize("country, phone, website, email, grade", [
+    ("UAE", "04 123 4567", "shop.ae", "", "B"),
+    ("IN", "1800 123 4567", "", "", "C"),
+    ("IN", "+91 22 1234 5678 ext 55", "", "", "C"),
+    ("IN", "", "http://127.0.0.1:8123/lead/3", "", "E"),
+])
+def test_normalizing_keeps_the_grade_of_valid_contacts(country, phone, website, email, grade):
+    df = pd.DataFrame({"facebook_url": ["https://facebook.com/a"], "country": [country],
+                       "phone_numbers": [phone], "websites": [website], "emails": [email]})
+    assert normalize_leads(df)["grade"].tolist() == [grade]
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("+44 20 7946 0958", "+442079460958"),
+    ("0044 20 7946 0958", "+442079460958"),
+    ("98765 43210, 91234 56789", "+919876543210, +919123456789"),
+    ("98765 43210 / +91 98765 43210", "+919876543210"),
+    ("+1234567890123456", ""),
+    ("", ""),
+])
+def test_e164_edge_cases(raw, expected):
+    assert phones([raw]) == [expected]
+
+
+def test_rows_without_a_country_use_the_default():
+    df = pd.DataFrame({"facebook_url": ["a", "b"], "country": ["", "UAE"],
+                       "phone_numbers": ["050 123 4567", "050 123 4567"]})
+    # Too short for an Indian number, so it is kept as written.
+    assert normalize_leads(df, default_country="IN")["phones_e164"].tolist() == ["050 123 4567", "+971501234567"]
+
+
+def test_emails_are_lower_cased_and_invalid_ones_dropped():
+    df = pd.DataFrame({"facebook_url": ["a", "b", "c"], "emails": ["Sales@Shop.in.", "not-an-email", "a@b.co, x@"]})
+    assert normalize_leads(df)["emails_normalized"].tolist() == ["sales@shop.in", "", "a@b.co"]
+
+
+def test_later_pages_sharing_a_contact_point_at_the_first_one():
+    df = pd.DataFrame({
+        "facebook_url": ["u0", "u1", "u2", "u3", "u4"],
+        "phone_numbers": ["+91 98765 43210", "", "098765 43210", "", ""],
+        "emails": ["", "Sales@Shop.in", "", "sales@shop.in", ""],
+        "websites": ["", "", "", "www.shop.in", "shop.in/"],
+    })
+    assert normalize_leads(df)["duplicate_of"].tolist() == ["", "", "u0", "u1", "u3"]
+
+
+def test_pages_without_contacts_are_never_duplicates():
+    df = pd.DataFrame({"facebook_url": ["u0", "u1"], "phone_numbers": ["", ""]})
+    assert normalize_leads(df)["duplicate_of"].tolist() == ["", ""]
@@ -0,0 +1,106 @@
+import random
+
+import pytest
+
+import retry_scheduler
+from retry_scheduler import (FAILURE_BLOCKED, FAILURE_EMPTY, FAILURE_ERROR, FAILURE_NAVIGATION, FAILURE_TIMEOUT,
+                             RetryScheduler, backoff_delay)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A fake monotonic clock that only moves when next() would sleep."""
+    now = [1000.0]
+    monkeypatch.setattr(retry_scheduler.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(retry_scheduler.time, "sleep", lambda seconds: now.__setitem__(0, now[0] + seconds))
+    return now
+
+
+def drain(scheduler):
+    jobs = []
+    while (job := scheduler.next()) is not None:
+        jobs.append(job)
+    return jobs
+
+
+def test_backoff_doubles_up_to_the_cap_with_half_of_it_random():
+    random.seed(1)
+    for attempt, full in [(1, 30), (2, 60), (3, 120), (6, 600), (10, 600)]:
+        delays = [backoff_delay(attempt, base_s=30, max_s=600) for _ in range(200)]
+        assert full / 2 <= min(delays) and max(delays) <= full
+
+
+def test_fresh_urls_come_out_in_order():
+    assert drain(RetryScheduler(["a", "b", "c"])) == [("a", 1), ("b", 1), ("c", 1)]
+
+
+def test_due_retries_jump_ahead_of_fresh_urls(clock):
+    scheduler = RetryScheduler(["a", "b", "c"], base_backoff_s=10)
+    assert scheduler.next() == ("a", 1)
+    delay = scheduler.record_failure("a", 1, FAILURE_TIMEOUT)
+    assert scheduler.next() == ("b", 1)
+    clock[0] += delay
+    assert scheduler.next() == ("a", 2)
+    assert scheduler.next() == ("c", 1)
+
+
+def test_next_waits_for_the_last_retry_instead_of_returning_early(clock):
+    scheduler = RetryScheduler(["a"], base_backoff_s=10)
+    scheduler.next()
+    delay = scheduler.record_failure("a", 1, FAILURE_NAVIGATION)
+    started = clock[0]
+    assert scheduler.next() == ("a", 2)
+    assert clock[0] - started == pytest.approx(delay)
+    assert scheduler.next() is None
+
+
+@pytest.mark.parametrize("kind", [FAILURE_TIMEOUT, FAILURE_NAVIGATION, FAILURE_BLOCKED])
+def test_transient_failures_are_retried_until_max_attempts(kind, clock):
+    scheduler = RetryScheduler(["a"], max_attempts=3)
+    outcomes = []
+    for url, attempt in iter(scheduler.next, None):
+        scheduler.record_failure(url, attempt, kind, "boom")
+        outcomes.append(scheduler.failures["a"]["outcome"])
+    assert outcomes == ["retrying", "retrying", "gave_up"]
+    assert scheduler.failures["a"] == {"url": "a", "failure_kind": kind, "attempts": 3,
+                                       "last_error": "boom", "outcome": "gave_up"}
+
+
+@pytest.mark.parametrize("kind", [FAILURE_ERROR, FAILURE_EMPTY])
+def test_other_failures_are_not_retried(kind):
+    scheduler = RetryScheduler(["a"])
+    url, attempt = scheduler.next()
+    assert scheduler.record_failure(url, attempt, kind) is None
+    assert scheduler.failures["a"]["outcome"] == "not_retryable"
+    assert scheduler.next() is None
+
+
+@pytest.mark.parametrize("empty_retries, max_attempts, attempts", [(1, 3, 2), (2, 3, 3), (5, 3, 3)])
+def test_empty_intros_get_empty_retries_capped_by_max_attempts(empty_retries, max_attempts, attempts, clock):
+    scheduler = RetryScheduler(["a"], max_attempts=max_attempts, empty_retries=empty_retries)
+    jobs = []
+    for url, attempt in iter(scheduler.next, None):
+        jobs.append(attempt)
+        scheduler.record_failure(url, attempt, FAILURE_EMPTY)
+    assert jobs == list(range(1, attempts + 1))
+    assert scheduler.failures["a"]["outcome"] == "gave_up"
+
+
+def test_a_success_after_failures_is_recovered(clock):
+    scheduler = RetryScheduler(["a", "b"])
+    url, attempt = scheduler.next()
+    scheduler.record_failure(url, attempt, FAILURE_BLOCKED)
+    for url, attempt in iter(scheduler.next, None):
+        scheduler.record_success(url, attempt)
+    assert scheduler.failures == {"a": {"url": "a", "failure_kind": FAILURE_BLOCKED, "attempts": 2,
+                                        "last_error": "", "outcome": "recovered"}}
+
+
+def test_report_lists_failed_urls_only(tmp_path):
+    scheduler = RetryScheduler(["a", "b"])
+    assert scheduler.write_report(tmp_path / "failures.csv") is None
+    url, attempt = scheduler.next()
+    scheduler.record_failure(url, attempt, FAILURE_ERROR, "x" * 600)
+    report = scheduler.write_report(tmp_path / "failures.csv")
+    assert report["url"].tolist() == ["a"] and len(report["last_error"][0]) == 500
+    assert (tmp_path / "failures.csv").exists()
@@ -0,0 +1,29 @@
+import pytest
+from bs4 import BeautifulSoup
+
+from fixture_servers import FacebookFixtureServer
+from scraping_backends import INTRO_READY_SELECTOR, INTRO_SELECTOR, extract_record_from_html, page_title
+
+
+@pytest.fixture
+def facebook():
+    # Only the page rendering is used, so the server is never started.
+    server = FacebookFixtureServer(pages=10)
+    yield server
+    server.httpd.server_close()
+
+
+def test_ready_selector_matches_only_once_the_intro_is_there(facebook):
+    for i in range(facebook.pages):
+        assert BeautifulSoup(facebook.render_profile(i), "html.parser").select(INTRO_READY_SELECTOR)
+    shell = '<div class="x9f619 x1ja2u2z"><div class="x1ja2u2z"></div></div>'
+    soup = BeautifulSoup(shell, "html.parser")
+    assert soup.select(INTRO_SELECTOR) and not soup.select(INTRO_READY_SELECTOR)
+
+
+def test_html_extraction_matches_the_rendered_profile(facebook):
+    for i in range(facebook.pages):
+        soup = BeautifulSoup(facebook.render_profile(i), "html.parser")
+        record = extract_record_from_html(soup)
+        record.update({"Business_Name": page_title(soup.title.get_text()), "facebook_url": f"{facebook.url}/page{i}"})
+        assert record == facebook.expected_record(i)